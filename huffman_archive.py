@@ -0,0 +1,600 @@
+import mmap
+import os
+import pickle
+import sqlite3
+import struct
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+import huffman_backend as hf
+
+# Bố cục file archive (.huffa):
+#   [ARCHIVE_MAGIC][payload ảnh 1][payload ảnh 2]...[index (pickle)][footer]
+# Footer có kích thước cố định, nằm ở cuối file, trỏ tới vị trí index.
+# Khi thêm ảnh (mode 'a'), payload mới được ghi đè lên index cũ. Trước đó index và footer cũ
+# được chép sang file journal (path + '.journal') và chỉ bị xóa sau khi index mới đã ghi xong,
+# nên archive bị ngắt giữa chừng vẫn mở được với các ảnh đã có (các ảnh đang thêm dở bị bỏ).
+ARCHIVE_MAGIC = b'HUFARC\x01\x00'
+FOOTER_MAGIC = b'HUFAIDX\x00'
+FOOTER_FORMAT = '<QQ8s'
+FOOTER_SIZE = struct.calcsize(FOOTER_FORMAT)
+ARCHIVE_VERSION = 2
+
+
+TILE_INDEX_SUFFIX = '.tiles'
+JOURNAL_SUFFIX = '.journal'
+
+
+def _codebook_key(coder, model):
+    entropy_coder = hf.ENTROPY_CODERS.get(coder)
+    if model is None or entropy_coder is None:
+        return None
+    model_key = entropy_coder.model_key(model)
+    return (coder, model_key) if model_key is not None else None
+
+
+class TileIndex:
+    """Index ô ảnh (hash -> vị trí payload trong archive) lưu bằng sqlite cạnh file archive.
+
+    Chỉ tối đa cache_size bản ghi được giữ trong bộ nhớ (LRU), phần còn lại nằm trên đĩa.
+    evict() xóa các ô lâu không được dùng khỏi index: payload của chúng vẫn nằm trong archive
+    cho các ảnh đã tham chiếu, chỉ là ảnh thêm sau sẽ không dùng lại được nữa.
+    """
+
+    def __init__(self, path, cache_size=4096):
+        self.path = path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._touched = {}
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS tiles (hash BLOB PRIMARY KEY, record BLOB NOT NULL, last_used INTEGER NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS tiles_last_used ON tiles (last_used)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._clock = self._meta('clock') or 0
+
+    def __len__(self):
+        self._flush_touched()
+        return self._connection.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+
+    def _meta(self, key):
+        row = self._connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _remember(self, key, record):
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _flush_touched(self):
+        if self._touched:
+            self._connection.executemany("UPDATE tiles SET last_used = ? WHERE hash = ?",
+                                         [(clock, key) for key, clock in self._touched.items()])
+            self._touched.clear()
+
+    def get(self, key):
+        record = self._cache.get(key)
+        if record is None:
+            row = self._connection.execute("SELECT record FROM tiles WHERE hash = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            record = pickle.loads(row[0])
+        self._remember(key, record)
+        # Thời điểm dùng được ghi dồn theo lô thay vì mỗi lần truy cập một câu UPDATE.
+        self._clock += 1
+        self._touched[key] = self._clock
+        if len(self._touched) >= self.cache_size:
+            self._flush_touched()
+        return record
+
+    def put(self, key, record):
+        self._clock += 1
+        self._touched.pop(key, None)
+        self._connection.execute("INSERT OR REPLACE INTO tiles (hash, record, last_used) VALUES (?, ?, ?)",
+                                 (key, pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL), self._clock))
+        self._remember(key, record)
+
+    def evict(self, max_entries):
+        """Giữ lại tối đa max_entries ô được dùng gần nhất. Trả về số ô đã xóa khỏi index."""
+        self._flush_touched()
+        removed = self._connection.execute(
+            "DELETE FROM tiles WHERE hash IN (SELECT hash FROM tiles ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (max(max_entries, 0),)).rowcount
+        if removed:
+            self._cache.clear()
+        return removed
+
+    def clear(self):
+        self._touched.clear()
+        self._cache.clear()
+        self._connection.execute("DELETE FROM tiles")
+
+    def index_offset(self):
+        return self._meta('index_offset')
+
+    def commit(self, index_offset):
+        """Ghi index xuống đĩa, kèm vị trí index của archive để phát hiện index ô lệch với archive."""
+        self._flush_touched()
+        self._set_meta('clock', self._clock)
+        self._set_meta('index_offset', index_offset)
+        self._connection.commit()
+
+    def close(self):
+        # Thay đổi chưa commit (vd archive lỗi giữa chừng) bị bỏ qua.
+        self._connection.close()
+
+
+class HuffmanArchive:
+    """Gom nhiều ảnh đã mã hóa vào một file, kèm index ở cuối file.
+
+    mode: 'r' (chỉ đọc), 'w' (tạo mới/ghi đè), 'a' (mở để thêm ảnh).
+    Các lần đọc dùng chung một mmap nên một lần mở phục vụ được nhiều lần truy xuất.
+    Ảnh thêm với dedup_tile_size được chia ô; ô đã có trong archive (theo index ô ở file
+    path + '.tiles') chỉ được tham chiếu, không mã hóa và lưu lại. max_tile_entries giới hạn
+    số ô giữ trong index (bỏ các ô lâu không dùng khi đóng archive).
+    """
+
+    def __init__(self, path, mode='r', tile_cache_size=4096, max_tile_entries=None):
+        if mode not in ('r', 'w', 'a'):
+            raise ValueError(f"Mode archive không hợp lệ: '{mode}' (chỉ hỗ trợ 'r', 'w', 'a').")
+        self.path = path
+        self.mode = mode
+        self.entries = []
+        self.codebooks = []
+        self._names = {}
+        self._codebook_refs = {}
+        self._file = None
+        self._mmap = None
+        self._mmap_size = 0
+        self._data_end = len(ARCHIVE_MAGIC)
+        self._index_offset = None
+        self._journaled = False
+        self._dirty = False
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.tile_index_path = path + TILE_INDEX_SUFFIX
+        self.tile_cache_size = tile_cache_size
+        self.max_tile_entries = max_tile_entries
+        self.tile_stats = {'tiles': 0, 'reused': 0}
+        self._tiles = None
+
+        if mode == 'a' and not os.path.exists(path):
+            mode = 'w'
+
+        if mode == 'w':
+            # Index ô và journal của archive cũ trỏ tới dữ liệu sắp bị ghi đè.
+            for stale_path in (self.tile_index_path, self.journal_path):
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+            self._file = open(path, 'w+b')
+            self._file.write(ARCHIVE_MAGIC)
+            self._dirty = True
+        else:
+            self._file = open(path, 'rb' if mode == 'r' else 'r+b')
+            try:
+                self._load_index()
+            except Exception:
+                self._file.close()
+                raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def _load_index(self):
+        file_size = os.fstat(self._file.fileno()).st_size
+        if file_size < len(ARCHIVE_MAGIC) + FOOTER_SIZE:
+            raise ValueError(f"File archive '{self.path}' quá ngắn hoặc bị hỏng.")
+
+        self._file.seek(0)
+        if self._file.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+            raise ValueError(f"File '{self.path}' không phải archive Huffman.")
+
+        self._file.seek(file_size - FOOTER_SIZE)
+        footer = self._file.read(FOOTER_SIZE)
+        index_offset, index_length, footer_magic = struct.unpack(FOOTER_FORMAT, footer)
+        footer_valid = footer_magic == FOOTER_MAGIC and index_offset + index_length + FOOTER_SIZE == file_size
+        index_bytes = None
+
+        journal = self._read_journal()
+        if journal is not None:
+            journal_footer, journal_index = journal
+            if footer_valid and footer != journal_footer:
+                # Index mới đã ghi xong trước khi journal kịp bị xóa.
+                if self.mode != 'r':
+                    os.remove(self.journal_path)
+            else:
+                index_offset, index_length, _ = struct.unpack(FOOTER_FORMAT, journal_footer)
+                index_bytes = journal_index
+                footer_valid = True
+                self._journaled = True
+                # Ghi lại index hợp lệ khi đóng (nếu được phép ghi).
+                self._dirty = self.mode != 'r'
+                print(f"Cảnh báo: Archive '{self.path}' bị ngắt khi đang thêm ảnh, khôi phục index từ journal "
+                      f"(các ảnh đang thêm dở bị bỏ).", file=sys.stderr)
+        if not footer_valid:
+            raise ValueError(f"Footer của archive '{self.path}' không hợp lệ.")
+
+        if index_bytes is None:
+            self._file.seek(index_offset)
+            index_bytes = self._file.read(index_length)
+        try:
+            index = pickle.loads(index_bytes)
+        except (pickle.UnpicklingError, EOFError, ImportError, IndexError) as e:
+            raise ValueError(f"Index của archive '{self.path}' bị hỏng. ({e})")
+
+        if index.get('version') != ARCHIVE_VERSION:
+            raise ValueError(f"Phiên bản archive không được hỗ trợ: {index.get('version')}")
+
+        self.entries = index['entries']
+        self.codebooks = index['codebooks']
+        self._names = {entry['name']: i for i, entry in enumerate(self.entries)}
+        self._codebook_refs = {}
+        for i, (coder, model) in enumerate(self.codebooks):
+            key = _codebook_key(coder, model)
+            if key is not None:
+                self._codebook_refs[key] = i
+        self._index_offset = index_offset
+        self._index_length = index_length
+        # Ảnh thêm sau được ghi từ vị trí index cũ (index cũ đã được chép vào journal trước đó).
+        self._data_end = index_offset
+
+    def _read_journal(self):
+        try:
+            with open(self.journal_path, 'rb') as f_journal:
+                journal_footer = f_journal.read(FOOTER_SIZE)
+                journal_index = f_journal.read()
+        except FileNotFoundError:
+            return None
+        if len(journal_footer) != FOOTER_SIZE:
+            return None
+        _, index_length, footer_magic = struct.unpack(FOOTER_FORMAT, journal_footer)
+        if footer_magic != FOOTER_MAGIC or index_length != len(journal_index):
+            # Journal ghi dở: index cũ trong archive chưa bị đụng tới.
+            return None
+        return journal_footer, journal_index
+
+    def _write_journal(self):
+        # Chép index và footer hiện tại ra journal (đã fsync) trước khi ghi đè lên chúng.
+        self._file.seek(self._index_offset)
+        index_bytes = self._file.read(self._index_length)
+        with open(self.journal_path, 'wb') as f_journal:
+            f_journal.write(struct.pack(FOOTER_FORMAT, self._index_offset, self._index_length, FOOTER_MAGIC))
+            f_journal.write(index_bytes)
+            f_journal.flush()
+            os.fsync(f_journal.fileno())
+        self._journaled = True
+
+    def _reader(self):
+        # mmap được tạo lại khi file đã lớn thêm (sau khi add trong mode 'a'/'w').
+        if self._mmap is None or self._mmap_size < self._data_end:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._file.flush()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmap_size = len(self._mmap)
+        return self._mmap
+
+    def _add_codebook(self, coder, model):
+        # Model giống nhau (cùng coder) chỉ lưu một lần trong index.
+        if model is None:
+            return None
+        key = _codebook_key(coder, model)
+        ref = self._codebook_refs.get(key) if key is not None else None
+        if ref is None:
+            ref = len(self.codebooks)
+            self.codebooks.append((coder, model))
+            if key is not None:
+                self._codebook_refs[key] = ref
+        return ref
+
+    def _store_models(self, info):
+        # Model của từng mặt phẳng byte / lớp progressive cũng được lưu qua bảng codebook dùng chung.
+        stored = {key: value for key, value in info.items() if key not in ('model', 'planes', 'layers')}
+        stored['codebook'] = self._add_codebook(info.get('coder'), info.get('model'))
+        for key in ('planes', 'layers'):
+            if key in info:
+                stored[key] = [self._store_models(part) for part in info[key]]
+        return stored
+
+    def _resolve_models(self, stored):
+        info = {key: value for key, value in stored.items() if key not in ('codebook', 'planes', 'layers')}
+        # Entry cũ có thể còn model nằm trực tiếp trong từng mặt phẳng/lớp (không có 'codebook').
+        if 'codebook' in stored:
+            info['model'] = self.codebooks[stored['codebook']][1] if stored['codebook'] is not None else None
+        for key in ('planes', 'layers'):
+            if key in stored:
+                info[key] = [self._resolve_models(part) for part in stored[key]]
+        return info
+
+    def _tile_index(self):
+        if self._tiles is None:
+            self._tiles = TileIndex(self.tile_index_path, self.tile_cache_size)
+            if self._tiles.index_offset() != self._index_offset:
+                # Index thiếu hoặc lệch với archive (vd bị xóa, archive ghi dở): dựng lại từ các entry.
+                self._tiles.clear()
+                for entry in self.entries:
+                    for tile in entry.get('tiles', []):
+                        self._tiles.put(tile['hash'], {key: value for key, value in tile.items() if key != 'hash'})
+        return self._tiles
+
+    def evict_tiles(self, max_entries):
+        """Chỉ giữ max_entries ô dùng gần nhất trong index ô. Trả về số ô bị bỏ."""
+        if self.mode == 'r':
+            print("Lỗi: Archive đang mở ở chế độ chỉ đọc.", file=sys.stderr)
+            return 0
+        return self._tile_index().evict(max_entries)
+
+    def _write_payloads(self, name, payloads):
+        try:
+            if self._index_offset is not None and not self._journaled:
+                self._write_journal()
+            # Từ đây index cũ có thể bị ghi đè: close() phải ghi lại index dù lần ghi này lỗi.
+            self._dirty = True
+            self._file.seek(self._data_end)
+            for payload in payloads:
+                self._file.write(payload)
+            # Payload có thể nằm trong vùng đã mmap (đè lên index cũ): phải flush để đọc lại được ngay.
+            self._file.flush()
+        except OSError as e:
+            print(f"Lỗi khi ghi ảnh '{name}' vào archive: {e}", file=sys.stderr)
+            try:
+                self._file.truncate(self._data_end)
+            except OSError:
+                pass
+            return False
+        return True
+
+    def _add_tiled(self, name, image, tile_size, method, sample_size, coder, num_streams, interleave):
+        try:
+            img_data_flat, img_dtype_str = hf.flatten_image_data(image)
+            original_shape = np.array(image).shape
+            array = img_data_flat.reshape(original_shape)
+            palette_data = image.getpalette() if image.mode == 'P' else None
+        except Exception as e:
+            print(f"Lỗi khi xử lý dữ liệu ảnh: {e}", file=sys.stderr)
+            return False
+        if len(original_shape) < 2:
+            print("Lỗi: Chia ô cần ảnh 2 chiều.", file=sys.stderr)
+            return False
+
+        tile_index = self._tile_index()
+        slices = hf.tile_slices(original_shape, tile_size)
+        tiles = [None] * len(slices)
+        new_positions = {}
+        new_tiles = []
+        for i, tile_slice in enumerate(slices):
+            tile = array[tile_slice]
+            key = hf.tile_hash(tile, img_dtype_str)
+            if key in new_positions:
+                new_positions[key].append(i)
+                continue
+            record = tile_index.get(key)
+            if record is not None:
+                tiles[i] = dict(record, hash=key)
+            else:
+                new_positions[key] = [i]
+                new_tiles.append(np.ascontiguousarray(tile))
+
+        encoded = hf.encode_tiles(new_tiles, method, sample_size, coder, num_streams, interleave)
+        if encoded is None:
+            return False
+        info, results = encoded
+        if not self._write_payloads(name, [payload for _, payload in results]):
+            return False
+
+        start = self._data_end
+        codebook = self._add_codebook(info['coder'], info['model'])
+        for (key, positions), (layout, payload) in zip(new_positions.items(), results):
+            record = {'offset': self._data_end, 'length': len(payload), 'method': info['method'],
+                      'coder': info['coder'], 'codebook': codebook, 'layout': layout}
+            tile_index.put(key, record)
+            for i in positions:
+                tiles[i] = dict(record, hash=key)
+            self._data_end += len(payload)
+
+        self.tile_stats['tiles'] += len(slices)
+        self.tile_stats['reused'] += len(slices) - len(new_tiles)
+        self._names[name] = len(self.entries)
+        self.entries.append({
+            'name': name, 'shape': original_shape, 'mode': image.mode, 'dtype_str': img_dtype_str,
+            'palette': palette_data, 'method': 'tiles', 'coder': None, 'layout': None,
+            'tile_size': tile_size, 'tiles': tiles,
+            'offset': start, 'length': self._data_end - start, 'codebook': None,
+        })
+        self._dirty = True
+        return True
+
+    def add(self, name, image_or_path, method='auto', sample_size=None, coder='huffman', num_streams=1, interleave='round_robin',
+            byte_planes=None, plane_transform=None, workers=None, progressive_levels=0, dedup_tile_size=None):
+        if self.mode == 'r':
+            print("Lỗi: Archive đang mở ở chế độ chỉ đọc.", file=sys.stderr)
+            return False
+        if name in self._names:
+            print(f"Lỗi: Archive đã có ảnh tên '{name}'.", file=sys.stderr)
+            return False
+
+        if isinstance(image_or_path, (str, os.PathLike)):
+            try:
+                image = hf.Image.open(image_or_path)
+            except FileNotFoundError:
+                print(f"Lỗi: Không tìm thấy file ảnh '{image_or_path}'", file=sys.stderr)
+                return False
+            except Exception as e:
+                print(f"Lỗi khi mở ảnh: {e}", file=sys.stderr)
+                return False
+        else:
+            image = image_or_path
+
+        if dedup_tile_size is not None:
+            if not isinstance(dedup_tile_size, int) or dedup_tile_size < 1:
+                print(f"Lỗi: Kích thước ô phải là số nguyên dương (nhận {dedup_tile_size}).", file=sys.stderr)
+                return False
+            if progressive_levels or byte_planes:
+                print("Lỗi: Chia ô để khử trùng lặp không dùng chung được với progressive hoặc mặt phẳng byte.", file=sys.stderr)
+                return False
+            if not hf.validate_encode_options(method, coder, num_streams, interleave):
+                return False
+            return self._add_tiled(name, image, dedup_tile_size, method, sample_size, coder, num_streams, interleave)
+
+        encoded = hf.encode_image_data(image, method, sample_size, coder, num_streams, interleave,
+                                        byte_planes, plane_transform, workers, progressive_levels)
+        if encoded is None:
+            return False
+        metadata, payload = encoded
+
+        entry = self._store_models(metadata)
+        entry['name'] = name
+        entry['offset'] = self._data_end
+        entry['length'] = len(payload)
+
+        if not self._write_payloads(name, [payload]):
+            return False
+
+        self._data_end += len(payload)
+        self._names[name] = len(self.entries)
+        self.entries.append(entry)
+        self._dirty = True
+        return True
+
+    def list(self):
+        return [dict(entry) for entry in self.entries]
+
+    def read_entry(self, name, max_level=None):
+        index = self._names.get(name)
+        if index is None:
+            print(f"Lỗi: Không có ảnh tên '{name}' trong archive.", file=sys.stderr)
+            return None
+        entry = self.entries[index]
+        metadata = self._resolve_models({key: value for key, value in entry.items()
+                                         if key not in ('name', 'offset', 'length')})
+        if metadata.get('method') == 'tiles':
+            # Các ô có thể nằm rải rác (dùng lại từ ảnh khác): gom payload theo thứ tự ô.
+            reader = self._reader()
+            metadata['tiles'] = [{'method': tile['method'], 'coder': tile['coder'], 'layout': tile['layout'],
+                                  'model': self.codebooks[tile['codebook']][1] if tile['codebook'] is not None else None,
+                                  'length': tile['length']} for tile in entry['tiles']]
+            payload = b"".join(reader[tile['offset']:tile['offset'] + tile['length']] for tile in entry['tiles'])
+            return metadata, payload
+
+        length = entry['length']
+        if metadata.get('method') == 'progressive' and max_level is not None:
+            length = hf.progressive_payload_length(metadata, max_level)
+        payload = self._reader()[entry['offset']:entry['offset'] + length]
+        return metadata, payload
+
+    def extract(self, name, output_path=None, max_level=None):
+        """Giải mã một ảnh. Trả về đối tượng Image nếu không có output_path, ngược lại lưu file và trả về đường dẫn.
+
+        max_level: với ảnh progressive, chỉ đọc và giải mã max_level lớp đầu (ảnh xem trước).
+        """
+        stored = self.read_entry(name, max_level)
+        if stored is None:
+            return None
+        metadata, payload = stored
+
+        reconstructed_array = hf.decode_image_data(metadata, payload, max_level=max_level)
+        if reconstructed_array is None:
+            return None
+
+        try:
+            decoded_image = hf.array_to_image(reconstructed_array, metadata['mode'], metadata.get('palette'))
+            if output_path is None:
+                return decoded_image
+            return hf.save_decoded_image(decoded_image, output_path, metadata['mode'])
+        except Exception as e:
+            print(f"Lỗi khi tạo/lưu ảnh '{name}' từ archive: {e}", file=sys.stderr)
+            return None
+
+    def extract_many(self, names=None, output_dir=None, extension='.png', max_level=None):
+        """Giải mã nhiều ảnh qua cùng một mmap. Trả về dict tên -> Image/đường dẫn (None nếu lỗi)."""
+        if names is None:
+            names = [entry['name'] for entry in self.entries]
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+
+        results = {}
+        for name in names:
+            output_path = None
+            if output_dir is not None:
+                output_path = os.path.join(output_dir, os.path.splitext(os.path.basename(name))[0] + extension)
+            results[name] = self.extract(name, output_path, max_level)
+        return results
+
+    def _write_index(self):
+        index = {
+            'version': ARCHIVE_VERSION,
+            'entries': self.entries,
+            'codebooks': self.codebooks,
+        }
+        index_bytes = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.seek(self._data_end)
+        self._file.write(index_bytes)
+        self._file.write(struct.pack(FOOTER_FORMAT, self._data_end, len(index_bytes), FOOTER_MAGIC))
+        self._file.truncate()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._index_offset = self._data_end
+        self._index_length = len(index_bytes)
+        if self._journaled:
+            os.remove(self.journal_path)
+            self._journaled = False
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            if self._dirty:
+                self._write_index()
+                self._dirty = False
+            if self._tiles is not None:
+                if self.max_tile_entries is not None:
+                    self._tiles.evict(self.max_tile_entries)
+                self._tiles.commit(self._index_offset)
+        finally:
+            if self._tiles is not None:
+                self._tiles.close()
+                self._tiles = None
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            self._file.close()
+            self._file = None
+
+
+def create_archive(image_paths, archive_path, append=False, dedup_tile_size=None, max_tile_entries=None):
+    print(f"--- Bắt đầu tạo archive ---")
+    added = 0
+    try:
+        with HuffmanArchive(archive_path, 'a' if append else 'w', max_tile_entries=max_tile_entries) as archive:
+            for image_path in image_paths:
+                if archive.add(os.path.basename(image_path), image_path, dedup_tile_size=dedup_tile_size):
+                    added += 1
+                else:
+                    print(f"Bỏ qua ảnh lỗi: {image_path}", file=sys.stderr)
+            tile_stats = archive.tile_stats
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Lỗi khi mở archive: {e}", file=sys.stderr)
+        return False
+
+    print(f"Đã thêm {added}/{len(image_paths)} ảnh vào archive: {archive_path}")
+    if tile_stats['tiles']:
+        print(f"Dùng lại {tile_stats['reused']}/{tile_stats['tiles']} ô ảnh đã có trong archive.")
+    print(f"--- Tạo archive hoàn tất ---")
+    return added == len(image_paths)
@@ -0,0 +1,56 @@
+"""Nén ảnh không mất dữ liệu bằng mã Huffman / tANS.
+
+Các module con chỉ được import khi lần đầu truy cập tới tên tương ứng (PEP 562), nên
+`import huffman_backend` gần như không tốn thời gian:
+    huffman   - cây Huffman, bảng mã, chuỗi bit (chỉ dùng thư viện chuẩn)
+    coders    - các bộ mã hóa entropy (NumPy)
+    codec     - mã hóa/giải mã dữ liệu ảnh dạng mảng (NumPy, không cần PIL)
+    image_io  - đọc/ghi file ảnh và file .huff (PIL chỉ được import khi cần)
+"""
+import importlib
+
+_EXPORTS = {
+    'huffman': (
+        'HuffmanNode', 'build_frequency_table', 'build_huffman_tree', 'generate_huffman_codes',
+        'huffman_code_lengths', 'encode_data', 'decode_data', 'pad_encoded_text', 'remove_padding',
+        'get_byte_array', 'bits_to_string',
+    ),
+    'coders': (
+        'INTERLEAVE_MODES', 'MAX_STREAMS', 'sample_histogram', 'pack_bit_chunks', 'split_streams',
+        'merge_streams', 'EntropyCoder', 'HuffmanByteDecoder', 'HuffmanCoder', 'TansCoder', 'ENTROPY_CODERS',
+        'register_entropy_coder', 'get_entropy_coder', 'estimate_encoded_size',
+    ),
+    'codec': (
+        'ENCODE_METHODS', 'PLANE_TRANSFORMS', 'MAX_PROGRESSIVE_LEVELS', 'flatten_image_data',
+        'encode_symbols', 'split_byte_planes', 'merge_byte_planes', 'encode_samples',
+        'build_progressive_layers', 'upsample_nearest', 'refinement_mask', 'progressive_layer_shapes',
+        'reconstruct_progressive', 'tile_slices', 'tile_hash', 'encode_tiles', 'validate_encode_options',
+        'encode_image_data', 'decode_symbols', 'decode_byte_planes', 'decode_samples',
+        'progressive_payload_length', 'decode_progressive', 'decode_tiles', 'decode_image_data',
+    ),
+    'image_io': (
+        'encode_image', 'array_to_image', 'save_decoded_image', 'decode_image', 'compare_images',
+    ),
+}
+
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+# Giữ tương thích với mã cũ dùng hf.Image / hf.ImageOps.
+_PIL_MODULES = {'Image': 'PIL.Image', 'ImageOps': 'PIL.ImageOps'}
+
+__all__ = sorted(_MODULE_OF)
+
+
+def __getattr__(name):
+    if name in _MODULE_OF:
+        value = getattr(importlib.import_module(f'.{_MODULE_OF[name]}', __name__), name)
+    elif name in _PIL_MODULES:
+        value = importlib.import_module(_PIL_MODULES[name])
+    else:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    # Lưu lại để các lần truy cập sau không qua __getattr__ nữa.
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_MODULE_OF) | set(_PIL_MODULES))
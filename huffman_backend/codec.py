@@ -0,0 +1,454 @@
+import hashlib
+import os
+import sys
+
+import numpy as np
+
+from .coders import INTERLEAVE_MODES, MAX_STREAMS, estimate_encoded_size, get_entropy_coder
+
+
+ENCODE_METHODS = ('auto', 'entropy', 'stored')
+PLANE_TRANSFORMS = (None, 'delta', 'xor')
+MAX_PROGRESSIVE_LEVELS = 8
+
+
+def flatten_image_data(image):
+    img_array = np.array(image)
+    if img_array.dtype == bool:
+        img_array = img_array.astype(np.uint8)
+    return img_array.flatten(), img_array.dtype.str
+
+
+def encode_symbols(data, method='auto', sample_size=None, coder='huffman', num_streams=1, interleave='round_robin'):
+    """Mã hóa một dãy ký hiệu. Trả về (thông tin mã hóa, payload) hoặc None."""
+    entropy_coder = get_entropy_coder(coder)
+    if entropy_coder is None:
+        return None
+
+    model = None
+    if len(data) > 0 and method == 'auto':
+        estimate = estimate_encoded_size(data, sample_size, coder)
+        if estimate['encoded_bytes'] < estimate['stored_bytes']:
+            method = 'entropy'
+            if not estimate['sampled']:
+                model = estimate['model']
+        else:
+            method = 'stored'
+            print(f"{coder} không có lợi (ước tính {estimate['encoded_bytes']} >= {estimate['stored_bytes']} bytes), lưu dữ liệu thô.")
+
+    if method == 'stored':
+        return {'method': 'stored', 'coder': None, 'model': None, 'layout': None}, data.tobytes()
+
+    encoded = entropy_coder.encode(data, model, num_streams, interleave)
+    if encoded is None:
+        return None
+    model, payload, layout = encoded
+    return {'method': 'entropy', 'coder': coder, 'model': model, 'layout': layout}, payload
+
+
+def split_byte_planes(data, transform=None):
+    """Tách mẫu nhiều byte thành các mặt phẳng byte (byte thấp trước), tùy chọn biến đổi delta/xor trước."""
+    itemsize = data.dtype.itemsize
+    values = data.astype(data.dtype.newbyteorder('<'), copy=False).view(f'<u{itemsize}')
+    if transform == 'delta':
+        # Hiệu với mẫu trước, tràn số theo modulo 2^bits nên đảo ngược được bằng cumsum.
+        values = values - np.concatenate((values[:1] * 0, values[:-1]))
+    elif transform == 'xor':
+        values = values ^ np.concatenate((values[:1] * 0, values[:-1]))
+    byte_matrix = values.view(np.uint8).reshape(-1, itemsize)
+    return [np.ascontiguousarray(byte_matrix[:, i]) for i in range(itemsize)]
+
+
+def merge_byte_planes(planes, dtype, transform=None):
+    itemsize = len(planes)
+    byte_matrix = np.stack(planes, axis=1) if planes[0].size else np.empty((0, itemsize), dtype=np.uint8)
+    values = np.ascontiguousarray(byte_matrix).view(f'<u{itemsize}').reshape(-1)
+    if transform == 'delta':
+        values = np.cumsum(values, dtype=values.dtype)
+    elif transform == 'xor':
+        values = np.bitwise_xor.accumulate(values)
+    little_endian = np.dtype(dtype).newbyteorder('<')
+    return values.view(little_endian).astype(dtype, copy=False)
+
+
+def encode_samples(data, method='auto', sample_size=None, coder='huffman', num_streams=1, interleave='round_robin',
+                   byte_planes=None, plane_transform=None, workers=None):
+    """Như encode_symbols, nhưng mẫu nhiều byte có thể được tách thành các mặt phẳng byte."""
+    # Mẫu nhiều byte (I;16, I, F): mỗi mặt phẳng byte có bảng mã riêng, nhỏ gọn, mã hóa song song.
+    # Mã hóa Huffman chạy trên NumPy (np.unique, tra bảng mã, pack_bit_chunks) và nhả GIL nên dùng luồng là đủ.
+    if byte_planes is None:
+        byte_planes = data.dtype.itemsize > 1
+    if not (byte_planes and data.dtype.itemsize > 1 and method != 'stored' and len(data) > 0):
+        return encode_symbols(data, method, sample_size, coder, num_streams, interleave)
+
+    # concurrent.futures kéo theo logging: chỉ import khi thật sự tách mặt phẳng byte.
+    from concurrent.futures import ThreadPoolExecutor
+
+    planes = split_byte_planes(data, plane_transform)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            lambda plane: encode_symbols(plane, method, sample_size, coder, num_streams, interleave), planes))
+    if any(result is None for result in results):
+        return None
+
+    info = {'method': 'planes', 'coder': None, 'model': None, 'layout': None,
+            'plane_transform': plane_transform,
+            'planes': [dict(plane_info, length=len(payload)) for plane_info, payload in results]}
+    return info, b"".join(payload for _, payload in results)
+
+
+def build_progressive_layers(array, levels):
+    """Lớp cơ sở lấy mẫu thưa 2^levels, sau đó mỗi lớp tinh chỉnh gấp đôi độ phân giải.
+
+    Lớp tinh chỉnh chỉ chứa các điểm mới, dưới dạng hiệu (modulo 2^bits) với giá trị dự đoán
+    từ lớp thô hơn (lặp điểm gần nhất), nên khôi phục chính xác tuyệt đối.
+    """
+    values = array.view(f'u{array.dtype.itemsize}')
+    step = 1 << levels
+    layers = [np.ascontiguousarray(values[::step, ::step]).ravel()]
+    for level in range(levels, 0, -1):
+        fine = values[::1 << (level - 1), ::1 << (level - 1)]
+        coarse = fine[::2, ::2]
+        residual = fine - upsample_nearest(coarse, fine.shape)
+        layers.append(residual[refinement_mask(fine.shape)].ravel())
+    return layers
+
+
+def upsample_nearest(coarse, shape):
+    return np.repeat(np.repeat(coarse, 2, axis=0), 2, axis=1)[:shape[0], :shape[1]]
+
+
+def refinement_mask(shape):
+    mask = np.ones(shape[:2], dtype=bool)
+    mask[::2, ::2] = False
+    return mask
+
+
+def progressive_layer_shapes(shape, levels):
+    return [(-(-shape[0] // (1 << level)), -(-shape[1] // (1 << level))) + tuple(shape[2:])
+            for level in range(levels, -1, -1)]
+
+
+def reconstruct_progressive(layers, shape, levels, dtype):
+    unsigned = np.dtype(f'u{np.dtype(dtype).itemsize}')
+    layer_shapes = progressive_layer_shapes(shape, levels)
+    current = np.asarray(layers[0], dtype=unsigned).reshape(layer_shapes[0])
+    for residual, fine_shape in zip(layers[1:], layer_shapes[1:]):
+        fine = upsample_nearest(current, fine_shape).copy()
+        mask = refinement_mask(fine_shape)
+        fine[mask] += np.asarray(residual, dtype=unsigned).reshape((-1,) + tuple(fine_shape[2:]))
+        current = fine
+    # Cùng các byte như mảng gốc, chỉ cần xem lại theo dtype ban đầu.
+    return current.view(dtype)
+
+
+def tile_slices(shape, tile_size):
+    """Lưới ô vuông tile_size x tile_size trên hai chiều đầu (ô ở mép có thể nhỏ hơn), theo thứ tự hàng."""
+    return [(slice(y, min(y + tile_size, shape[0])), slice(x, min(x + tile_size, shape[1])))
+            for y in range(0, shape[0], tile_size) for x in range(0, shape[1], tile_size)]
+
+
+def tile_hash(tile, dtype_str):
+    """Khóa nội dung của một ô: hash các byte pixel, kèm shape và dtype để ô khác kích thước không trùng khóa."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{dtype_str}{tile.shape}".encode())
+    digest.update(np.ascontiguousarray(tile).tobytes())
+    return digest.digest()
+
+
+def encode_tiles(tiles, method='auto', sample_size=None, coder='huffman', num_streams=1, interleave='round_robin'):
+    """Mã hóa các ô bằng một model chung (model riêng cho mỗi ô nhỏ sẽ lớn hơn cả dữ liệu).
+
+    Trả về (thông tin mã hóa chung, [(layout, payload) cho mỗi ô]) hoặc None.
+    """
+    entropy_coder = get_entropy_coder(coder)
+    if entropy_coder is None:
+        return None
+    data = np.concatenate([tile.ravel() for tile in tiles]) if tiles else np.array([], dtype=np.uint8)
+
+    model = None
+    if len(data) > 0 and method != 'stored':
+        estimate = estimate_encoded_size(data, sample_size, coder)
+        if method == 'auto' and estimate['encoded_bytes'] >= estimate['stored_bytes']:
+            method = 'stored'
+            print(f"{coder} không có lợi cho các ô mới (ước tính {estimate['encoded_bytes']} >= {estimate['stored_bytes']} bytes), lưu dữ liệu thô.")
+        else:
+            method = 'entropy'
+            model = estimate['model'] if not estimate['sampled'] else estimate_encoded_size(data, None, coder)['model']
+    else:
+        method = 'stored'
+
+    if method == 'stored':
+        return {'method': 'stored', 'coder': None, 'model': None}, [(None, tile.tobytes()) for tile in tiles]
+
+    results = []
+    for tile in tiles:
+        encoded = entropy_coder.encode(tile.ravel(), model, num_streams, interleave)
+        if encoded is None:
+            return None
+        _, payload, layout = encoded
+        results.append((layout, payload))
+    return {'method': 'entropy', 'coder': coder, 'model': model}, results
+
+
+def validate_encode_options(method='auto', coder='huffman', num_streams=1, interleave='round_robin',
+                            plane_transform=None, progressive_levels=0):
+    if method not in ENCODE_METHODS:
+        print(f"Lỗi: Phương thức mã hóa không hợp lệ '{method}' (hỗ trợ: {', '.join(ENCODE_METHODS)}).", file=sys.stderr)
+        return False
+    if not 1 <= num_streams <= MAX_STREAMS:
+        print(f"Lỗi: Số luồng bit phải trong khoảng 1..{MAX_STREAMS} (nhận {num_streams}).", file=sys.stderr)
+        return False
+    if interleave not in INTERLEAVE_MODES:
+        print(f"Lỗi: Kiểu chia luồng không hợp lệ '{interleave}' (hỗ trợ: {', '.join(INTERLEAVE_MODES)}).", file=sys.stderr)
+        return False
+    if plane_transform not in PLANE_TRANSFORMS:
+        print(f"Lỗi: Biến đổi mặt phẳng byte không hợp lệ '{plane_transform}' (hỗ trợ: {', '.join(map(str, PLANE_TRANSFORMS))}).", file=sys.stderr)
+        return False
+    if not isinstance(progressive_levels, int) or not 0 <= progressive_levels <= MAX_PROGRESSIVE_LEVELS:
+        print(f"Lỗi: Số mức progressive phải trong khoảng 0..{MAX_PROGRESSIVE_LEVELS} (nhận {progressive_levels}).", file=sys.stderr)
+        return False
+    return get_entropy_coder(coder) is not None
+
+
+def encode_image_data(image, method='auto', sample_size=None, coder='huffman', num_streams=1, interleave='round_robin',
+                      byte_planes=None, plane_transform=None, workers=None, progressive_levels=0):
+    if not validate_encode_options(method, coder, num_streams, interleave, plane_transform, progressive_levels):
+        return None
+
+    try:
+        img_data_flat, img_dtype_str = flatten_image_data(image)
+        original_shape = np.array(image).shape 
+        image_mode = image.mode
+    
+        palette_data = None
+        if image_mode == 'P':
+            palette_data = image.getpalette()
+
+    except Exception as e:
+        print(f"Lỗi khi xử lý dữ liệu ảnh: {e}", file=sys.stderr)
+        return None
+
+    if len(img_data_flat) == 0:
+        print("Ảnh không chứa dữ liệu pixel để mã hóa (có thể là ảnh 0 pixel).")
+
+    metadata = {
+        'shape': original_shape,
+        'mode': image_mode,
+        'dtype_str': img_dtype_str,
+        'palette': palette_data
+    }
+
+    if progressive_levels and len(img_data_flat) > 0:
+        if len(original_shape) < 2:
+            print("Lỗi: Chế độ progressive cần ảnh 2 chiều.", file=sys.stderr)
+            return None
+        layers = build_progressive_layers(img_data_flat.reshape(original_shape), progressive_levels)
+        results = []
+        for layer in layers:
+            encoded = encode_samples(layer, method, sample_size, coder, num_streams, interleave,
+                                     byte_planes, plane_transform, workers)
+            if encoded is None:
+                return None
+            results.append(encoded)
+
+        metadata.update({'method': 'progressive', 'coder': None, 'model': None, 'layout': None,
+                         'levels': progressive_levels,
+                         'layers': [dict(info, length=len(payload)) for info, payload in results]})
+        return metadata, b"".join(payload for _, payload in results)
+
+    encoded = encode_samples(img_data_flat, method, sample_size, coder, num_streams, interleave,
+                             byte_planes, plane_transform, workers)
+    if encoded is None:
+        return None
+    info, output_byte_array = encoded
+    metadata.update(info)
+    return metadata, output_byte_array
+
+
+def decode_symbols(info, payload, count, target_dtype):
+    """Giải mã một dãy ký hiệu đã mã hóa bằng encode_symbols. Trả về mảng 1 chiều hoặc None."""
+    method = info.get('method')
+    if method == 'stored':
+        if len(payload) != count * target_dtype.itemsize:
+            print(f"Lỗi khi đọc dữ liệu thô (stored): cần {count * target_dtype.itemsize} bytes, có {len(payload)} bytes.", file=sys.stderr)
+            return None
+        return np.frombuffer(payload, dtype=target_dtype).copy()
+    if method != 'entropy':
+        print(f"Lỗi: Phương thức mã hóa không được hỗ trợ: '{method}'.", file=sys.stderr)
+        return None
+    if count == 0:
+        return np.array([], dtype=target_dtype)
+
+    entropy_coder = get_entropy_coder(info.get('coder'))
+    if entropy_coder is None:
+        return None
+    decoded_data = entropy_coder.decode(info.get('model'), payload, count, info.get('layout'))
+    if decoded_data is None:
+        return None
+
+    if len(decoded_data) != count:
+         print(f"Lỗi: Số lượng pixel giải mã ({len(decoded_data)}) không khớp kích thước ảnh gốc ({count}). File có thể bị lỗi hoặc metadata sai.", file=sys.stderr)
+         return None
+
+    try:
+        return np.asarray(decoded_data, dtype=target_dtype)
+    except (ValueError, TypeError, OverflowError) as e:
+         print(f"Lỗi: Không thể chuyển đổi ký hiệu giải mã sang kiểu dữ liệu {target_dtype}. Ký hiệu ví dụ: {decoded_data[0]}. Lỗi: {e}", file=sys.stderr)
+         return None
+
+
+def decode_byte_planes(planes, plane_transform, payload, count, target_dtype, workers=None):
+    if len(planes) != target_dtype.itemsize or sum(plane['length'] for plane in planes) != len(payload):
+        print("Lỗi: Thông tin mặt phẳng byte không khớp với dữ liệu.", file=sys.stderr)
+        return None
+
+    offsets = np.concatenate(([0], np.cumsum([plane['length'] for plane in planes]))).tolist()
+    plane_payloads = [payload[offsets[i]:offsets[i + 1]] for i in range(len(planes))]
+    plane_dtypes = [np.dtype(np.uint8)] * len(planes)
+    if workers is None:
+        workers = min(len(planes), os.cpu_count() or 1)
+    if workers > 1:
+        # Giải mã Huffman/tANS là vòng lặp Python giữ GIL: chạy song song bằng tiến trình, không dùng luồng.
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            decoded_planes = list(pool.map(decode_symbols, planes, [bytes(plane_payload) for plane_payload in plane_payloads],
+                                           [count] * len(planes), plane_dtypes))
+    else:
+        decoded_planes = list(map(decode_symbols, planes, plane_payloads, [count] * len(planes), plane_dtypes))
+    if any(plane is None for plane in decoded_planes):
+        return None
+    return merge_byte_planes(decoded_planes, target_dtype, plane_transform)
+
+
+def decode_samples(info, payload, count, target_dtype, workers=None):
+    if info.get('method') == 'planes':
+        return decode_byte_planes(info.get('planes', []), info.get('plane_transform'), payload, count, target_dtype, workers)
+    return decode_symbols(info, payload, count, target_dtype)
+
+
+def progressive_payload_length(metadata, max_level=None):
+    """Số byte payload cần đọc để giải mã max_level lớp đầu (None: toàn bộ)."""
+    layers = metadata.get('layers', [])
+    n_layers = len(layers) if max_level is None else max(1, min(max_level, len(layers)))
+    return sum(layer['length'] for layer in layers[:n_layers])
+
+
+def decode_progressive(metadata, payload, target_dtype, workers=None, max_level=None):
+    layers = metadata.get('layers', [])
+    levels = metadata.get('levels', 0)
+    shape = metadata['shape']
+    if len(layers) != levels + 1 or len(shape) < 2:
+        print("Lỗi: Thông tin các lớp progressive không hợp lệ.", file=sys.stderr)
+        return None
+    if max_level is not None and max_level < 1:
+        print(f"Lỗi: max_level phải >= 1 (nhận {max_level}).", file=sys.stderr)
+        return None
+
+    n_layers = len(layers) if max_level is None else min(max_level, len(layers))
+    if len(payload) < progressive_payload_length(metadata, n_layers):
+        print("Lỗi: Dữ liệu progressive bị thiếu so với thông tin các lớp.", file=sys.stderr)
+        return None
+
+    layer_shapes = progressive_layer_shapes(shape, levels)
+    channels = int(np.prod(shape[2:]))
+    unsigned = np.dtype(f'u{target_dtype.itemsize}')
+    decoded_layers = []
+    offset = 0
+    for i, layer in enumerate(layers[:n_layers]):
+        count = int(np.prod(layer_shapes[i]))
+        if i > 0:
+            count -= int(np.prod(layer_shapes[i - 1][:2])) * channels
+        decoded = decode_samples(layer, payload[offset:offset + layer['length']], count, unsigned, workers)
+        if decoded is None:
+            return None
+        decoded_layers.append(decoded)
+        offset += layer['length']
+
+    return reconstruct_progressive(decoded_layers, shape, levels, target_dtype)
+
+
+def decode_tiles(metadata, payload, target_dtype):
+    """Ghép lại ảnh từ các ô; mỗi ô trong metadata['tiles'] có thông tin mã hóa và độ dài payload riêng."""
+    shape = metadata['shape']
+    tiles = metadata.get('tiles', [])
+    slices = tile_slices(shape, metadata.get('tile_size', 0)) if len(shape) >= 2 and metadata.get('tile_size', 0) > 0 else []
+    if len(tiles) != len(slices) or sum(tile['length'] for tile in tiles) != len(payload):
+        print("Lỗi: Thông tin các ô ảnh không khớp với dữ liệu.", file=sys.stderr)
+        return None
+
+    reconstructed = np.empty(shape, dtype=target_dtype)
+    offset = 0
+    for tile, (rows, cols) in zip(tiles, slices):
+        tile_shape = (rows.stop - rows.start, cols.stop - cols.start) + tuple(shape[2:])
+        decoded = decode_symbols(tile, payload[offset:offset + tile['length']], int(np.prod(tile_shape)), target_dtype)
+        if decoded is None:
+            return None
+        reconstructed[rows, cols] = decoded.reshape(tile_shape)
+        offset += tile['length']
+    return reconstructed
+
+
+def decode_image_data(metadata, encoded_byte_data, workers=None, max_level=None):
+    try:
+        original_shape = metadata['shape']
+        image_mode = metadata['mode']
+        img_dtype_str = metadata.get('dtype_str', np.dtype(np.uint8).str)
+
+        # File cũ: không có 'method'/'coder', model là cây Huffman trong 'tree'.
+        method = metadata.get('method', 'entropy')
+        if method == 'huffman':
+            method = 'entropy'
+        info = {
+            'method': method,
+            'coder': metadata.get('coder', 'huffman'),
+            'model': metadata['model'] if 'model' in metadata else metadata['tree'],
+            'layout': metadata.get('layout'),
+        }
+
+        if not isinstance(original_shape, tuple) or not all(isinstance(dim, int) for dim in original_shape):
+             print("Lỗi: Metadata chứa shape không hợp lệ.", file=sys.stderr)
+             return None
+        if not isinstance(image_mode, str):
+             print("Lỗi: Metadata chứa image mode không hợp lệ.", file=sys.stderr)
+             return None
+    except KeyError as e:
+        print(f"Lỗi: Metadata thiếu key bắt buộc: {e}", file=sys.stderr)
+        return None
+    except Exception as e:
+        print(f"Lỗi khi truy cập metadata: {e}", file=sys.stderr)
+        return None
+
+    try:
+        target_dtype = np.dtype(img_dtype_str)
+    except TypeError:
+        print(f"Cảnh báo: Không thể nhận dạng dtype '{img_dtype_str}' từ metadata, dùng np.uint8.", file=sys.stderr)
+        target_dtype = np.dtype(np.uint8)
+
+    expected_elements = int(np.prod(original_shape)) if original_shape else 0
+    if expected_elements == 0 and method != 'stored':
+        print("Ảnh giải mã không có pixel (dựa trên shape).")
+
+    if method == 'progressive':
+        # Có thể chỉ giải mã vài lớp đầu: kết quả là ảnh độ phân giải thấp hơn.
+        return decode_progressive(metadata, encoded_byte_data, target_dtype, workers, max_level)
+
+    if method == 'tiles':
+        return decode_tiles(metadata, encoded_byte_data, target_dtype)
+
+    if method == 'planes':
+        info.update(planes=metadata.get('planes', []), plane_transform=metadata.get('plane_transform'))
+    decoded_array = decode_samples(info, encoded_byte_data, expected_elements, target_dtype, workers)
+    if decoded_array is None:
+        return None
+
+    try:
+        reconstructed_array = decoded_array.reshape(original_shape)
+    except ValueError as e:
+        print(f"Lỗi khi tái tạo ảnh từ dữ liệu giải mã (reshape): {e}", file=sys.stderr)
+        return None
+    except Exception as e:
+        print(f"Lỗi không xác định khi tái tạo mảng ảnh: {e}", file=sys.stderr)
+        return None
+
+    return reconstructed_array
@@ -0,0 +1,604 @@
+import pickle
+import struct
+import sys
+from array import array
+
+import numpy as np
+
+from .huffman import build_huffman_tree, generate_huffman_codes, huffman_code_lengths
+
+
+INTERLEAVE_MODES = ('round_robin', 'segment')
+MAX_STREAMS = 32
+
+
+def sample_histogram(data, sample_size=None):
+    data = np.asarray(data).ravel()
+    total = len(data)
+    sampled = sample_size is not None and 0 < sample_size < total
+    if sampled:
+        rng = np.random.default_rng(0)
+        data = data[rng.integers(0, total, size=sample_size)]
+
+    symbols, counts = np.unique(data, return_counts=True)
+    if sampled:
+        counts = counts * (total / sample_size)
+    return symbols, counts, sampled
+
+
+def pack_bit_chunks(values, nbits, block_size=1 << 16):
+    """Ghép các giá trị (mỗi giá trị nbits[i] bit, MSB trước) thành một dãy byte. Trả về (bytes, tổng số bit).
+
+    Các giá trị được tách bit theo từng khối block_size phần tử để ma trận bit tạm không lớn theo dữ liệu.
+    """
+    values = np.asarray(values)
+    nbits = np.asarray(nbits)
+    bit_count = int(nbits.sum(dtype=np.int64))
+    if bit_count == 0:
+        return b"", 0
+
+    bits = np.empty(bit_count, dtype=np.uint8)
+    position = 0
+    for start in range(0, len(values), block_size):
+        block_nbits = nbits[start:start + block_size].astype(np.int64)
+        width = int(block_nbits.max())
+        shifts = block_nbits[:, None] - 1 - np.arange(width, dtype=np.int64)[None, :]
+        valid = shifts >= 0
+        bit_matrix = (values[start:start + block_size, None].astype(np.uint64) >> np.where(valid, shifts, 0).astype(np.uint64)) & np.uint64(1)
+        block_bits = bit_matrix[valid]
+        bits[position:position + len(block_bits)] = block_bits
+        position += len(block_bits)
+    return np.packbits(bits).tobytes(), bit_count
+
+
+def split_streams(data, num_streams, interleave='round_robin'):
+    if interleave == 'round_robin':
+        return [data[i::num_streams] for i in range(num_streams)]
+    return np.array_split(data, num_streams)
+
+
+def merge_streams(streams, count, interleave='round_robin'):
+    if interleave == 'segment':
+        return np.concatenate(streams)
+    merged = np.empty(count, dtype=streams[0].dtype)
+    for i, stream in enumerate(streams):
+        merged[i::len(streams)] = stream
+    return merged
+
+
+class EntropyCoder:
+    """Giao diện chung cho các bộ mã hóa entropy.
+
+    encode(data, model=None, num_streams=1, interleave='round_robin') -> (model, payload bytes, layout) hoặc None
+    decode(model, payload, count, layout=None) -> dãy ký hiệu hoặc None
+    estimate(data, sample_size=None) -> dict ước tính kích thước
+    model_key(model) -> khóa hashable để dùng chung model (hoặc None)
+    """
+    name = None
+    supports_streams = False
+
+    def encode(self, data, model=None, num_streams=1, interleave='round_robin'):
+        raise NotImplementedError
+
+    def decode(self, model, payload, count, layout=None):
+        raise NotImplementedError
+
+    def estimate(self, data, sample_size=None):
+        raise NotImplementedError
+
+    def model_key(self, model):
+        return None
+
+
+class HuffmanByteDecoder:
+    """Giải mã chuỗi bit Huffman theo từng byte thay vì từng bit.
+
+    Mỗi cặp (nút trong, byte) chỉ duyệt cây một lần rồi được ghi nhớ; các lần sau một lần tra cho ra
+    mọi ký hiệu kết thúc trong byte đó. Kết quả là chỉ số ký hiệu (bytes, kiểu index_dtype), đổi sang
+    ký hiệu bằng to_symbols.
+    """
+
+    def __init__(self, huffman_tree):
+        if huffman_tree is None or huffman_tree.symbol is not None:
+            raise ValueError("Cây Huffman không hợp lệ để giải mã.")
+        self.root = huffman_tree
+        self.nodes = []
+        self.index = {}
+        leaves = []
+        stack = [huffman_tree]
+        while stack:
+            node = stack.pop()
+            if node.symbol is not None:
+                self.index[id(node)] = len(leaves)
+                leaves.append(node.symbol)
+            else:
+                self.index[id(node)] = len(self.nodes)
+                self.nodes.append(node)
+                stack.extend(child for child in (node.right, node.left) if child is not None)
+
+        self.symbols = np.array(leaves)
+        self.index_dtype = np.dtype(np.uint8 if len(leaves) <= 1 << 8 else np.uint16 if len(leaves) <= 1 << 16 else np.uint32)
+        # Trạng thái = chỉ số nút trong << 8, nên khóa tra cứu chỉ là trạng thái | byte. Gốc có trạng thái 0.
+        self.emitted = [None] * (len(self.nodes) << 8)
+        self.next_state = [0] * (len(self.nodes) << 8)
+
+    def walk_bits(self, state, byte, n_bits):
+        """Duyệt cây theo n_bits bit đầu (MSB trước) của byte. Trả về (chỉ số ký hiệu, trạng thái mới)."""
+        node = self.nodes[state >> 8]
+        emitted = []
+        for shift in range(7, 7 - n_bits, -1):
+            node = node.right if (byte >> shift) & 1 else node.left
+            if node is None:
+                raise ValueError("Chuỗi bit dẫn đến đường không tồn tại trong cây Huffman.")
+            if node.symbol is not None:
+                emitted.append(self.index[id(node)])
+                node = self.root
+        return array(self.index_dtype.char, emitted).tobytes(), self.index[id(node)] << 8
+
+    def walk(self, data, state=0):
+        """Giải mã mọi byte trong data. Trả về (bytearray chỉ số ký hiệu, trạng thái mới)."""
+        emitted_table = self.emitted
+        next_table = self.next_state
+        decoded = bytearray()
+        for byte in data:
+            key = state | byte
+            emitted = emitted_table[key]
+            if emitted is None:
+                emitted, next_table[key] = self.walk_bits(state, byte, 8)
+                emitted_table[key] = emitted
+            decoded += emitted
+            state = next_table[key]
+        return decoded, state
+
+    def walk_stream(self, data, state, bits_left):
+        """Giải mã data là phần tiếp theo của một luồng còn bits_left bit (byte cuối luồng có thể chỉ dùng một phần)."""
+        full_bytes = min(len(data), bits_left // 8)
+        decoded, state = self.walk(data[:full_bytes], state)
+        if full_bytes < len(data):
+            tail, state = self.walk_bits(state, data[full_bytes], bits_left % 8)
+            decoded += tail
+        return decoded, state
+
+    def to_symbols(self, indices):
+        return self.symbols[np.frombuffer(indices, dtype=self.index_dtype)]
+
+
+class HuffmanCoder(EntropyCoder):
+    name = 'huffman'
+    supports_streams = True
+
+    def encode(self, data, model=None, num_streams=1, interleave='round_robin'):
+        huffman_tree = model
+        if len(data) == 0:
+            return huffman_tree, bytes(1), None
+
+        if huffman_tree is None:
+            symbols, counts, _ = sample_histogram(data)
+            freq_table = dict(zip(symbols, counts.tolist()))
+            if not freq_table:
+                print("Lỗi: Không thể tạo bảng tần suất (dữ liệu có thể trống hoặc lỗi).", file=sys.stderr)
+                return None
+
+            huffman_tree = build_huffman_tree(freq_table)
+            if huffman_tree is None:
+                 print("Lỗi: Không thể xây dựng cây Huffman (bảng tần suất trống).", file=sys.stderr)
+                 return None
+
+        codebook = generate_huffman_codes(huffman_tree)
+        if not codebook:
+            print("Lỗi: Không thể tạo bảng mã Huffman.", file=sys.stderr)
+            return None
+
+        encoded = self.encode_streams(data, codebook, num_streams, interleave)
+        if encoded is None:
+            return None
+        payload, layout = encoded
+        return huffman_tree, payload, layout
+
+    def encode_streams(self, data, codebook, num_streams, interleave):
+        """Mã hóa bằng NumPy (tra bảng mã + pack_bit_chunks). Một luồng: byte padding + chuỗi bit như định dạng cũ."""
+        symbols = np.array(sorted(codebook))
+        code_lengths = np.array([len(codebook[symbol]) for symbol in symbols], dtype=np.uint8)
+        if code_lengths.max() > 64:
+            print("Lỗi: Mã Huffman dài hơn 64 bit, không thể mã hóa.", file=sys.stderr)
+            return None
+        code_values = np.array([int(codebook[symbol], 2) for symbol in symbols], dtype=np.uint64)
+
+        data = np.asarray(data).ravel()
+        symbol_index = np.minimum(np.searchsorted(symbols, data), len(symbols) - 1)
+        if np.any(symbols[symbol_index] != data):
+            print("Lỗi mã hóa Huffman: Dữ liệu chứa ký hiệu không có trong bảng mã.", file=sys.stderr)
+            return None
+
+        if num_streams == 1:
+            packed, bit_count = pack_bit_chunks(code_values[symbol_index], code_lengths[symbol_index])
+            return bytes([-bit_count % 8]) + packed, None
+
+        chunks = []
+        bit_lengths = []
+        for stream in split_streams(symbol_index, num_streams, interleave):
+            packed, bit_count = pack_bit_chunks(code_values[stream], code_lengths[stream])
+            chunks.append(packed)
+            bit_lengths.append(bit_count)
+
+        layout = {'interleave': interleave, 'bit_lengths': bit_lengths}
+        return b"".join(chunks), layout
+
+    def decode(self, model, payload, count, layout=None):
+        huffman_tree = model
+        if huffman_tree is None:
+            print("Lỗi: Cây Huffman là None nhưng kích thước ảnh mong đợi khác 0.", file=sys.stderr)
+            return None
+        return self.decode_streams(huffman_tree, payload, count, layout)
+
+    def decode_streams(self, huffman_tree, payload, count, layout):
+        try:
+            chunks = list(self.iter_decode_streams(huffman_tree, payload, count, layout))
+        except ValueError as e:
+            print(f"Lỗi: {e}", file=sys.stderr)
+            return None
+        if not chunks:
+            print(f"Lỗi: Dữ liệu bit mã hóa trống nhưng ảnh gốc có {count} pixel.", file=sys.stderr)
+            return None
+        return np.concatenate(chunks)
+
+    def iter_decode_bits(self, huffman_tree, blocks):
+        """Giải mã payload một luồng (byte padding + chuỗi bit) được đưa vào theo từng khối byte.
+
+        Byte cuối của mỗi khối được giữ lại đến khối sau, vì chỉ byte cuối payload chứa bit padding.
+        """
+        decoder = HuffmanByteDecoder(huffman_tree)
+        extra_padding = None
+        held = None
+        state = 0
+        for block in blocks:
+            if extra_padding is None and len(block):
+                extra_padding = block[0]
+                if extra_padding > 7:
+                    raise ValueError("Dữ liệu một luồng bit không hợp lệ (thông tin padding sai).")
+                block = block[1:]
+            if not len(block):
+                continue
+            decoded = bytearray()
+            if held is not None:
+                decoded, state = decoder.walk((held,), state)
+            more, state = decoder.walk(block[:-1], state)
+            decoded += more
+            held = block[-1]
+            yield decoder.to_symbols(decoded)
+
+        if extra_padding is None or (held is None and extra_padding):
+            raise ValueError("Dữ liệu một luồng bit không hợp lệ (thiếu thông tin padding).")
+        if held is not None:
+            decoded, state = decoder.walk_bits(state, held, 8 - extra_padding)
+            yield decoder.to_symbols(decoded)
+        if state != 0:
+            raise ValueError("Chuỗi bit kết thúc giữa chừng một ký hiệu. File có thể bị lỗi.")
+
+    def iter_decode_streams(self, huffman_tree, payload, count, layout, block_bytes=1 << 16):
+        """Như iter_decode_blocks, với payload đã có sẵn trong bộ nhớ."""
+        blocks = (payload[start:start + block_bytes] for start in range(0, len(payload), block_bytes))
+        return self.iter_decode_blocks(huffman_tree, blocks, count, layout)
+
+    def iter_decode_blocks(self, huffman_tree, blocks, count, layout):
+        """Giải mã payload được đưa vào dần theo từng khối byte, trả về dần từng đoạn ký hiệu theo thứ tự gốc.
+
+        Các luồng nằm nối tiếp nhau trong payload nên được giải mã theo thứ tự đọc. Với segment, mỗi
+        khối cho ra ngay một đoạn; với round_robin, ký hiệu được giữ lại đến khi mọi luồng cùng có.
+        layout None: payload một luồng, giải mã bằng iter_decode_bits.
+        Dữ liệu lỗi gây ValueError (có thể sau khi đã trả về một số đoạn).
+        """
+        mismatch = "Luồng bit không khớp với số ký hiệu mong đợi. File có thể bị lỗi."
+        if layout is None:
+            decoded_count = 0
+            for symbols in self.iter_decode_bits(huffman_tree, blocks):
+                decoded_count += len(symbols)
+                if decoded_count > count:
+                    raise ValueError(mismatch)
+                yield symbols
+            if decoded_count != count:
+                raise ValueError(mismatch)
+            return
+
+        interleave = layout.get('interleave')
+        bit_lengths = [int(bit_count) for bit_count in layout.get('bit_lengths', [])]
+        num_streams = len(bit_lengths)
+        if interleave not in INTERLEAVE_MODES or num_streams == 0:
+            raise ValueError(f"Bố cục luồng bit không hợp lệ: {layout}")
+        stream_counts = [len(s) for s in split_streams(np.empty(count, dtype=np.int8), num_streams, interleave)]
+
+        decoder = HuffmanByteDecoder(huffman_tree)
+        itemsize = decoder.index_dtype.itemsize
+        bits_left = list(bit_lengths)
+        states = [0] * num_streams
+        decoded_counts = [0] * num_streams
+        pending = [bytearray() for _ in range(num_streams)]
+        full_rows = min(stream_counts)
+        rows_done = 0
+
+        stream = 0
+        for block in blocks:
+            position = 0
+            while position < len(block):
+                while stream < num_streams and bits_left[stream] == 0:
+                    stream += 1
+                if stream == num_streams:
+                    raise ValueError("Tổng độ dài các luồng bit không khớp với dữ liệu.")
+                take = min(len(block) - position, (bits_left[stream] + 7) // 8)
+                decoded, states[stream] = decoder.walk_stream(block[position:position + take], states[stream], bits_left[stream])
+                bits_left[stream] = max(0, bits_left[stream] - take * 8)
+                position += take
+
+                decoded_counts[stream] += len(decoded) // itemsize
+                if decoded_counts[stream] > stream_counts[stream]:
+                    raise ValueError(mismatch)
+                if interleave == 'segment':
+                    yield decoder.to_symbols(decoded)
+                    continue
+
+                # round_robin: hàng thứ r gồm ký hiệu thứ r của mọi luồng, tức các ký hiệu liên tiếp của dữ liệu gốc.
+                pending[stream] += decoded
+                rows = min(min(len(buffer) for buffer in pending) // itemsize, full_rows - rows_done)
+                if rows > 0:
+                    streams = []
+                    for buffer in pending:
+                        streams.append(np.frombuffer(bytes(buffer[:rows * itemsize]), dtype=decoder.index_dtype))
+                        del buffer[:rows * itemsize]
+                    rows_done += rows
+                    yield decoder.symbols[merge_streams(streams, rows * num_streams, interleave)]
+
+        if any(bits_left):
+            raise ValueError("Tổng độ dài các luồng bit không khớp với dữ liệu.")
+        if any(states) or decoded_counts != stream_counts:
+            raise ValueError(mismatch)
+        if interleave == 'round_robin' and count > rows_done * num_streams:
+            streams = [np.frombuffer(bytes(buffer), dtype=decoder.index_dtype) for buffer in pending]
+            yield decoder.symbols[merge_streams(streams, count - rows_done * num_streams, interleave)]
+
+    def estimate(self, data, sample_size=None):
+        symbols, counts, sampled = sample_histogram(data, sample_size)
+        freq_table = dict(zip(symbols, counts.tolist()))
+        huffman_tree = build_huffman_tree(freq_table)
+        lengths = huffman_code_lengths(huffman_tree)
+        payload_bits = sum(freq * lengths[symbol] for symbol, freq in freq_table.items())
+
+        model_bytes = len(pickle.dumps(huffman_tree, protocol=pickle.HIGHEST_PROTOCOL)) if huffman_tree is not None else 0
+        payload_bytes = int(np.ceil(payload_bits / 8)) + 1 # +1 byte thông tin padding
+        return {
+            'encoded_bytes': payload_bytes + model_bytes,
+            'payload_bytes': payload_bytes,
+            'model_bytes': model_bytes,
+            'symbols': len(symbols),
+            'sampled': sampled,
+            'model': huffman_tree,
+        }
+
+    def model_key(self, model):
+        # Hai cây cho cùng bảng mã thì giải mã như nhau, dùng bảng mã làm khóa.
+        if model is None:
+            return None
+        codebook = generate_huffman_codes(model)
+        return tuple(sorted((symbol.item() if hasattr(symbol, 'item') else symbol, code)
+                            for symbol, code in codebook.items()))
+
+
+class TansCoder(EntropyCoder):
+    """Mã hóa ANS dạng bảng (tANS/FSE): độ dài mã không bị làm tròn lên số bit nguyên.
+
+    Model chỉ chứa bảng tần suất chuẩn hóa; trạng thái cuối và số bit nằm ở đầu payload
+    để nhiều ảnh có thể dùng chung model.
+    """
+    name = 'tans'
+    STREAM_HEADER = '<IQ'
+
+    def __init__(self, table_log=12):
+        self.table_log = table_log
+
+    def build_model(self, symbols, counts):
+        n_symbols = len(symbols)
+        table_log = max(self.table_log, int(np.ceil(np.log2(max(n_symbols, 2)))) + 1)
+        table_size = 1 << table_log
+
+        counts = np.asarray(counts, dtype=np.float64)
+        norm = np.maximum(np.floor(counts * table_size / counts.sum()), 1).astype(np.int64)
+        # Bù phần chênh lệch vào các ký hiệu có tần suất lớn nhất, luôn giữ tần suất >= 1.
+        diff = table_size - int(norm.sum())
+        order = np.argsort(-norm, kind='stable')
+        if diff > 0:
+            norm[order[0]] += diff
+        else:
+            for i in order:
+                if diff == 0:
+                    break
+                take = min(int(norm[i]) - 1, -diff)
+                norm[i] -= take
+                diff += take
+
+        return {'symbols': np.asarray(symbols), 'norm': norm.astype(np.uint32), 'table_log': table_log}
+
+    def build_tables(self, model):
+        table_log = model['table_log']
+        table_size = 1 << table_log
+        norm = model['norm'].astype(np.int64)
+        n_symbols = len(norm)
+
+        # Trải ký hiệu lên bảng theo bước nhảy lẻ (hoán vị của 0..L-1), giống FSE.
+        step = (table_size >> 1) + (table_size >> 3) + 3
+        positions = (np.arange(table_size, dtype=np.int64) * step) & (table_size - 1)
+        slot_symbol = np.empty(table_size, dtype=np.int64)
+        slot_symbol[positions] = np.repeat(np.arange(n_symbols), norm)
+
+        # Thứ hạng của mỗi ô trong số các ô cùng ký hiệu -> trạng thái con x' thuộc [f, 2f).
+        slots_by_symbol = np.argsort(slot_symbol, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(norm)[:-1]))
+        rank = np.empty(table_size, dtype=np.int64)
+        rank[slots_by_symbol] = np.arange(table_size) - np.repeat(starts, norm)
+        sub_state = norm[slot_symbol] + rank
+
+        sub_state_log = np.floor(np.log2(sub_state)).astype(np.int64)
+        nb_bits = table_log - sub_state_log
+        next_state = sub_state << nb_bits
+
+        # Bảng mã hóa: với ký hiệu s, x' thuộc [f, 2f) -> trạng thái L + ô tương ứng.
+        norm_log = np.floor(np.log2(norm)).astype(np.int64)
+        encode_shift = table_log - norm_log
+        encode_threshold = norm << encode_shift
+        encode_state = table_size + slots_by_symbol
+
+        return {
+            'table_size': table_size,
+            'slot_symbol': slot_symbol,
+            'nb_bits': nb_bits,
+            'next_state': next_state,
+            'starts': starts,
+            'norm': norm,
+            'encode_shift': encode_shift,
+            'encode_threshold': encode_threshold,
+            'encode_state': encode_state,
+        }
+
+    def encode(self, data, model=None, num_streams=1, interleave='round_robin'):
+        if num_streams != 1:
+            print(f"Lỗi: Bộ mã hóa {self.name} chưa hỗ trợ chia nhiều luồng bit.", file=sys.stderr)
+            return None
+        data = np.asarray(data).ravel()
+        if model is None:
+            if len(data) == 0:
+                return None, b"", None
+            symbols, counts = np.unique(data, return_counts=True)
+            model = self.build_model(symbols, counts)
+        if len(data) == 0:
+            return model, struct.pack(self.STREAM_HEADER, 0, 0), None
+
+        symbol_index = np.searchsorted(model['symbols'], data)
+        if np.any(symbol_index >= len(model['symbols'])) or np.any(model['symbols'][np.minimum(symbol_index, len(model['symbols']) - 1)] != data):
+            print("Lỗi mã hóa tANS: Dữ liệu chứa ký hiệu không có trong model.", file=sys.stderr)
+            return None
+
+        tables = self.build_tables(model)
+        starts = tables['starts'].tolist()
+        norm = tables['norm'].tolist()
+        encode_shift = tables['encode_shift'].tolist()
+        encode_threshold = tables['encode_threshold'].tolist()
+        encode_state = tables['encode_state'].tolist()
+
+        # ANS là LIFO: mã hóa ngược, giải mã xuôi.
+        state = tables['table_size']
+        values = []
+        nbits = []
+        for s in reversed(symbol_index.tolist()):
+            k = encode_shift[s]
+            if state < encode_threshold[s]:
+                k -= 1
+            values.append(state & ((1 << k) - 1))
+            nbits.append(k)
+            state = encode_state[starts[s] + (state >> k) - norm[s]]
+
+        values.reverse()
+        nbits.reverse()
+        packed, bit_count = pack_bit_chunks(values, nbits)
+        return model, struct.pack(self.STREAM_HEADER, state, bit_count) + packed, None
+
+    def decode(self, model, payload, count, layout=None):
+        header_size = struct.calcsize(self.STREAM_HEADER)
+        if model is None or len(payload) < header_size:
+            print("Lỗi giải mã tANS: Thiếu model hoặc header của luồng bit.", file=sys.stderr)
+            return None
+        state, bit_count = struct.unpack(self.STREAM_HEADER, bytes(payload[:header_size]))
+        if bit_count > (len(payload) - header_size) * 8:
+            print("Lỗi giải mã tANS: Số bit trong header lớn hơn dữ liệu thực tế.", file=sys.stderr)
+            return None
+
+        tables = self.build_tables(model)
+        table_size = tables['table_size']
+        table_log = model['table_log']
+        if not table_size <= state < 2 * table_size:
+            print(f"Lỗi giải mã tANS: Trạng thái đầu không hợp lệ ({state}).", file=sys.stderr)
+            return None
+
+        bits = bytes(payload[header_size:]) + bytes(4)
+        slot_symbol = tables['slot_symbol'].tolist()
+        nb_bits = tables['nb_bits'].tolist()
+        next_state = tables['next_state'].tolist()
+
+        # Đọc bit qua một bộ đệm: khi còn ít hơn k bit thì nạp thêm 4 byte, không dựng trước cửa sổ cho mọi vị trí.
+        masks = [(1 << n) - 1 for n in range(33)]
+        decoded = [0] * count
+        buffered = 0
+        buffered_bits = 0
+        byte_position = 0
+        position = 0
+        for i in range(count):
+            slot = state - table_size
+            decoded[i] = slot_symbol[slot]
+            k = nb_bits[slot]
+            if k:
+                if buffered_bits < k:
+                    buffered = ((buffered & masks[buffered_bits]) << 32) | int.from_bytes(bits[byte_position:byte_position + 4], 'big')
+                    buffered_bits += 32
+                    byte_position += 4
+                buffered_bits -= k
+                state = next_state[slot] + ((buffered >> buffered_bits) & masks[k])
+            else:
+                state = next_state[slot]
+            position += k
+            if position > bit_count:
+                print("Lỗi giải mã tANS: Luồng bit kết thúc sớm.", file=sys.stderr)
+                return None
+
+        return model['symbols'][np.asarray(decoded, dtype=np.int64)]
+
+    def estimate(self, data, sample_size=None):
+        symbols, counts, sampled = sample_histogram(data, sample_size)
+        model = self.build_model(symbols, counts)
+        probabilities = model['norm'] / float(1 << model['table_log'])
+        payload_bits = float(np.sum(counts * -np.log2(probabilities)))
+
+        model_bytes = len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+        payload_bytes = int(np.ceil(payload_bits / 8)) + struct.calcsize(self.STREAM_HEADER)
+        return {
+            'encoded_bytes': payload_bytes + model_bytes,
+            'payload_bytes': payload_bytes,
+            'model_bytes': model_bytes,
+            'symbols': len(symbols),
+            'sampled': sampled,
+            'model': model,
+        }
+
+    def model_key(self, model):
+        if model is None:
+            return None
+        return (model['table_log'], model['symbols'].dtype.str, model['symbols'].tobytes(), model['norm'].tobytes())
+
+
+ENTROPY_CODERS = {}
+
+
+def register_entropy_coder(coder):
+    ENTROPY_CODERS[coder.name] = coder
+    return coder
+
+
+def get_entropy_coder(name):
+    coder = ENTROPY_CODERS.get(name)
+    if coder is None:
+        print(f"Lỗi: Bộ mã hóa entropy không được hỗ trợ: '{name}' (hỗ trợ: {', '.join(ENTROPY_CODERS)}).", file=sys.stderr)
+    return coder
+
+
+register_entropy_coder(HuffmanCoder())
+register_entropy_coder(TansCoder())
+
+
+def estimate_encoded_size(data, sample_size=None, coder='huffman'):
+    """Ước tính kích thước đầu ra từ histogram và độ dài mã, không cần mã hóa.
+
+    Nếu sample_size nhỏ hơn số phần tử, histogram được lấy từ một mẫu ngẫu nhiên rồi nhân tỉ lệ.
+    """
+    entropy_coder = get_entropy_coder(coder)
+    if entropy_coder is None:
+        return None
+    estimate = entropy_coder.estimate(data, sample_size)
+    estimate['coder'] = coder
+    estimate['stored_bytes'] = np.asarray(data).nbytes
+    return estimate
@@ -0,0 +1,191 @@
+import heapq
+import sys
+from collections import Counter
+
+
+class HuffmanNode:
+    # Cây Huffman được pickle vào file .huff: giữ tên 'huffman_backend.HuffmanNode' như trước khi tách package.
+    __module__ = 'huffman_backend'
+
+    def __init__(self, symbol, freq):
+        self.symbol = symbol
+        self.freq = freq
+        self.left = None
+        self.right = None
+
+    def __lt__(self, other):
+        return self.freq < other.freq
+
+    def __eq__(self, other):
+        if other is None or not isinstance(other, HuffmanNode):
+            return False
+        return self.freq == other.freq
+
+def build_frequency_table(data):
+    return Counter(data)
+
+def build_huffman_tree(freq_table):
+    priority_queue = [HuffmanNode(symbol, freq) for symbol, freq in freq_table.items()]
+    heapq.heapify(priority_queue)
+
+    if not priority_queue:
+        return None
+
+    if len(priority_queue) == 1:
+        node = heapq.heappop(priority_queue)
+        merged = HuffmanNode(None, node.freq)
+        merged.left = node
+        heapq.heappush(priority_queue, merged)
+
+    while len(priority_queue) > 1:
+        left = heapq.heappop(priority_queue)
+        right = heapq.heappop(priority_queue)
+
+        merged = HuffmanNode(None, left.freq + right.freq)
+        merged.left = left
+        merged.right = right
+
+        heapq.heappush(priority_queue, merged)
+    
+    return priority_queue[0] if priority_queue else None
+
+
+def generate_huffman_codes(node, prefix="", codebook=None):
+    if codebook is None:
+        codebook = {}
+
+    if node is None:
+        return codebook
+
+    if node.symbol is not None: # Nút lá
+        codebook[node.symbol] = prefix if prefix else "0"
+    else: # Nút nội bộ
+        if node.left:
+            generate_huffman_codes(node.left, prefix + "0", codebook)
+        if node.right:
+            generate_huffman_codes(node.right, prefix + "1", codebook)
+    return codebook
+
+
+def huffman_code_lengths(node, depth=0, lengths=None):
+    if lengths is None:
+        lengths = {}
+
+    if node is None:
+        return lengths
+
+    if node.symbol is not None:
+        lengths[node.symbol] = depth if depth else 1
+    else:
+        if node.left:
+            huffman_code_lengths(node.left, depth + 1, lengths)
+        if node.right:
+            huffman_code_lengths(node.right, depth + 1, lengths)
+    return lengths
+
+
+def encode_data(data, codebook):
+    if not codebook:
+        if not data:
+             return ""
+        print("Lỗi mã hóa: Codebook trống nhưng có dữ liệu.", file=sys.stderr)
+        return None
+    
+    encoded_bits = "".join(codebook.get(str(symbol) if not isinstance(symbol, str) else symbol, "") for symbol in data)
+    encoded_bits = "".join(codebook.get(symbol, "") for symbol in data)
+    return encoded_bits
+
+def decode_data(encoded_bits, huffman_tree):
+    if huffman_tree is None:
+        if not encoded_bits:
+            return []
+        print("Lỗi giải mã: Cây Huffman là None.", file=sys.stderr)
+        return None
+
+    decoded_symbols = []
+    current_node = huffman_tree
+
+
+    if current_node.symbol is not None:
+        if encoded_bits and all(bit == encoded_bits[0] for bit in encoded_bits):
+            pass
+
+    for bit in encoded_bits:
+        if current_node is None :
+            print("Lỗi giải mã: Đạt đến nút None khi đang duyệt cây.", file=sys.stderr)
+            return None
+
+        if bit == '0':
+            current_node = current_node.left
+        elif bit == '1':
+            current_node = current_node.right
+        else:
+            print(f"Lỗi giải mã: Ký tự không hợp lệ '{bit}' trong chuỗi bit.", file=sys.stderr)
+            return None
+
+        if current_node is None:
+             print(f"Lỗi giải mã: Chuỗi bit dẫn đến đường không tồn tại trong cây (bit='{bit}').", file=sys.stderr)
+             return None
+
+        if current_node.symbol is not None:
+            decoded_symbols.append(current_node.symbol)
+            current_node = huffman_tree
+    
+    is_single_symbol_tree = (huffman_tree.left is not None and huffman_tree.left.symbol is not None and huffman_tree.right is None) or \
+                            (huffman_tree.right is not None and huffman_tree.right.symbol is not None and huffman_tree.left is None)
+
+    if current_node != huffman_tree and not (current_node.symbol is not None and is_single_symbol_tree):
+        if current_node.symbol is None:
+            print("Cảnh báo giải mã: Chuỗi bit kết thúc giữa chừng của một ký tự.", file=sys.stderr)
+
+    return decoded_symbols
+
+
+def pad_encoded_text(encoded_text):
+    extra_padding = 8 - len(encoded_text) % 8
+    if extra_padding == 8:
+        extra_padding = 0
+    padded_encoded_text = encoded_text + '0' * extra_padding
+    padding_info = "{0:08b}".format(extra_padding)
+    return padded_encoded_text, padding_info
+
+def remove_padding(padded_encoded_text_with_info):
+    if len(padded_encoded_text_with_info) < 8:
+        print("Lỗi khi loại bỏ padding: Dữ liệu quá ngắn để chứa thông tin padding.", file=sys.stderr)
+        return ""
+    
+    padding_info_bits = padded_encoded_text_with_info[:8]
+    try:
+        extra_padding = int(padding_info_bits, 2)
+    except ValueError:
+        print("Lỗi khi loại bỏ padding: Thông tin padding không hợp lệ.", file=sys.stderr)
+        return "" 
+
+    padded_encoded_text = padded_encoded_text_with_info[8:]
+    
+    if extra_padding > len(padded_encoded_text) or extra_padding < 0: 
+         print(f"Lỗi khi loại bỏ padding: Số lượng padding không hợp lệ ({extra_padding}) cho độ dài {len(padded_encoded_text)}.", file=sys.stderr)
+         return ""
+
+    if extra_padding == 0:
+        return padded_encoded_text
+    else:
+        return padded_encoded_text[:-extra_padding]
+
+def get_byte_array(padded_encoded_text):
+    if len(padded_encoded_text) % 8 != 0:
+        print("Lỗi trong get_byte_array: Input không được padding đúng (chiều dài không chia hết cho 8).", file=sys.stderr)
+        raise ValueError("Chuỗi bit cần được padding để chia hết cho 8.")
+    
+    b = bytearray()
+    for i in range(0, len(padded_encoded_text), 8):
+        byte = padded_encoded_text[i:i+8]
+        try:
+            b.append(int(byte, 2))
+        except ValueError:
+            print(f"Lỗi trong get_byte_array: Chuỗi byte không hợp lệ '{byte}'.", file=sys.stderr)
+            raise
+    return bytes(b)
+
+def bits_to_string(byte_data):
+    return "".join(f"{byte:08b}" for byte in byte_data)
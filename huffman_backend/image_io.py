@@ -0,0 +1,239 @@
+# PIL chỉ được import trong các hàm đọc/ghi file ảnh: giải mã ra mảng không cần đến PIL.
+import os
+import pickle
+import sys
+
+import numpy as np
+
+from .codec import decode_image_data, encode_image_data, progressive_payload_length
+
+
+def encode_image(image_path, output_path, method='auto', sample_size=None, coder='huffman', num_streams=1, interleave='round_robin',
+                 byte_planes=None, plane_transform=None, workers=None, progressive_levels=0):
+    from PIL import Image
+
+    print(f"--- Bắt đầu mã hóa ---")
+    try:
+        image = Image.open(image_path)
+        print(f"Đang mã hóa ảnh: {image_path} ({image.mode}, {image.size})")
+    except FileNotFoundError:
+        print(f"Lỗi: Không tìm thấy file ảnh '{image_path}'", file=sys.stderr)
+        return False
+    except Exception as e:
+        print(f"Lỗi khi mở ảnh: {e}", file=sys.stderr)
+        return False
+    
+    original_size_bytes = 0
+    try:
+        original_size_bytes = os.path.getsize(image_path)
+        print(f"Kích thước gốc: {original_size_bytes} bytes")
+    except OSError as e:
+        print(f"Lỗi khi lấy kích thước file gốc: {e}", file=sys.stderr)
+
+    if image.width * image.height == 0 and original_size_bytes > 0:
+         print("Cảnh báo: Dữ liệu ảnh trống sau khi làm phẳng, dù file có kích thước.", file=sys.stderr)
+
+    encoded = encode_image_data(image, method, sample_size, coder, num_streams, interleave,
+                                byte_planes, plane_transform, workers, progressive_levels)
+    if encoded is None:
+        return False
+    metadata, output_byte_array = encoded
+    if metadata['method'] == 'progressive':
+        print(f"Phương thức mã hóa: progressive ({metadata['levels']} mức, {len(metadata['layers'])} lớp)")
+    elif metadata['method'] == 'planes':
+        print(f"Phương thức mã hóa: planes ({', '.join(plane['coder'] or 'raw' for plane in metadata['planes'])})")
+    else:
+        print(f"Phương thức mã hóa: {metadata['method']} ({metadata['coder'] or 'raw'})")
+
+    try:
+        with open(output_path, 'wb') as f_out:
+            pickle.dump(metadata, f_out, protocol=pickle.HIGHEST_PROTOCOL)
+            f_out.write(output_byte_array)
+        print(f"Đã lưu file mã hóa: {output_path}")
+    except Exception as e:
+        print(f"Lỗi khi lưu file mã hóa: {e}", file=sys.stderr)
+        if os.path.exists(output_path):
+            try: os.remove(output_path)
+            except OSError: pass
+        return False
+
+    try:
+        compressed_size_bytes = os.path.getsize(output_path)
+        if original_size_bytes > 0:
+             compression_ratio = compressed_size_bytes / original_size_bytes
+             print(f"Kích thước sau khi nén: {compressed_size_bytes} bytes")
+             print(f"Tỉ suất nén (compressed/original): {compression_ratio:.4f}")
+             print(f"Tỉ lệ tiết kiệm: {(1 - compression_ratio) * 100:.2f}%")
+        else: # Ảnh gốc 0 byte
+             print(f"Kích thước sau khi nén: {compressed_size_bytes} bytes")
+             if compressed_size_bytes > 0:
+                 print("Ảnh gốc 0 byte, ảnh nén có kích thước (do metadata).")
+             else:
+                 print("Ảnh gốc và ảnh nén đều 0 byte (hoặc lỗi lấy kích thước).")
+
+    except OSError as e:
+        print(f"Lỗi khi lấy kích thước file nén: {e}", file=sys.stderr)
+
+    print(f"--- Mã hóa hoàn tất ---")
+    return True
+
+
+def array_to_image(reconstructed_array, image_mode, palette_data=None):
+    from PIL import Image
+
+    if image_mode == '1':
+        unique_values = np.unique(reconstructed_array)
+        if not (len(unique_values) <= 2 and np.all(np.isin(unique_values, [0, 1]))):
+            print(f"Cảnh báo: Ảnh mode '1' chứa giá trị không phải 0/1: {unique_values}. Chuyển sang 'L' rồi '1'.", file=sys.stderr)
+            temp_img = Image.fromarray(reconstructed_array.astype(np.uint8), mode='L')
+            return temp_img.convert('1', dither=Image.NONE)
+        array_for_pil_1bit = (1 - reconstructed_array).astype(np.uint8)
+        return Image.fromarray(array_for_pil_1bit, mode='1')
+
+    if image_mode == 'P':
+        decoded_image = Image.fromarray(reconstructed_array, mode='P')
+        if palette_data:
+            decoded_image.putpalette(palette_data)
+        else:
+            print("Cảnh báo: Ảnh mode 'P' được giải mã mà không có palette. Màu sắc có thể không đúng.", file=sys.stderr)
+        return decoded_image
+
+    return Image.fromarray(reconstructed_array, mode=image_mode)
+
+
+def save_decoded_image(decoded_image, output_path, image_mode, compress_level=None):
+    from PIL import Image
+
+    output_ext = os.path.splitext(output_path)[1].lower()
+    output_format_pil = Image.registered_extensions().get(output_ext)
+
+    if output_format_pil:
+         if output_ext in ['.jpg', '.jpeg'] and image_mode != 'RGB':
+             if decoded_image.mode not in ['RGB', 'L', 'CMYK']:
+                 print(f"Cảnh báo: Ảnh mode {decoded_image.mode} không thể lưu trực tiếp sang JPG. Thử convert sang RGB.", file=sys.stderr)
+                 decoded_image = decoded_image.convert('RGB')
+             elif decoded_image.mode == 'L' or decoded_image.mode == '1':
+                 pass
+             
+         if output_ext in ['.jpg', '.jpeg']:
+             print(f"Cảnh báo: Lưu ảnh giải mã dưới dạng {output_ext} (lossy). Để so sánh chính xác, hãy lưu dưới dạng PNG hoặc BMP.", file=sys.stderr)
+             decoded_image.save(output_path, format=output_format_pil, quality=95)
+         elif output_format_pil == 'PNG' and compress_level is not None:
+             decoded_image.save(output_path, format=output_format_pil, compress_level=compress_level)
+         else:
+             decoded_image.save(output_path, format=output_format_pil)
+    else:
+         # Mặc định PNG nếu không nhận diện được
+         print(f"Không nhận dạng được định dạng từ '{output_ext}', mặc định lưu thành PNG.")
+         default_output_path = os.path.splitext(output_path)[0] + ".png"
+         if compress_level is not None:
+             decoded_image.save(default_output_path, format='PNG', compress_level=compress_level)
+         else:
+             decoded_image.save(default_output_path, format='PNG')
+         output_path = default_output_path
+    return output_path
+
+
+def decode_image(encoded_path, output_path, compress_level=None, max_level=None):
+    print(f"--- Bắt đầu giải mã ---")
+    try:
+        with open(encoded_path, 'rb') as f_in:
+            metadata = pickle.load(f_in)
+            if metadata.get('method') == 'progressive' and max_level is not None:
+                # Chỉ đọc các lớp cần thiết.
+                encoded_byte_data = f_in.read(progressive_payload_length(metadata, max_level))
+            else:
+                encoded_byte_data = f_in.read()
+    except FileNotFoundError:
+        print(f"Lỗi: Không tìm thấy file mã hóa '{encoded_path}'", file=sys.stderr)
+        return False
+    except (pickle.UnpicklingError, EOFError, ImportError, IndexError) as e: 
+        print(f"Lỗi: File mã hóa '{encoded_path}' bị hỏng hoặc không đúng định dạng. ({e})", file=sys.stderr)
+        return False
+    except Exception as e:
+        print(f"Lỗi khi đọc file mã hóa: {e}", file=sys.stderr)
+        return False
+
+    reconstructed_array = decode_image_data(metadata, encoded_byte_data, max_level=max_level)
+    if reconstructed_array is None:
+        return False
+
+    image_mode = metadata['mode']
+    palette_data = metadata.get('palette', None)
+    try:
+        decoded_image = array_to_image(reconstructed_array, image_mode, palette_data)
+        output_path = save_decoded_image(decoded_image, output_path, image_mode, compress_level)
+
+        print(f"Đã lưu ảnh giải mã: {output_path}")
+        print(f"--- Giải mã hoàn tất ---")
+        return output_path
+
+    except ValueError as e:
+         print(f"Lỗi khi tạo/lưu đối tượng Image: {e}. Mode: {image_mode}, Shape: {reconstructed_array.shape}", file=sys.stderr)
+         return False
+    except Exception as e:
+        print(f"Lỗi khi lưu ảnh giải mã: {e}", file=sys.stderr)
+        if os.path.exists(output_path):
+            try: os.remove(output_path)
+            except OSError: pass
+        return False
+
+
+def compare_images(image1_path, image2_path):
+    from PIL import Image
+
+    print(f"--- Bắt đầu so sánh ---")
+    print(f"Ảnh 1: {image1_path}")
+    print(f"Ảnh 2: {image2_path}")
+    try:
+        img1 = Image.open(image1_path)
+        img2 = Image.open(image2_path)
+
+        if img1.mode != img2.mode:
+            print(f"KHÁC BIỆT: Chế độ màu (mode) khác nhau: {img1.mode} vs {img2.mode}")
+            print(f"--- So sánh thất bại (khác mode) ---")
+            return False
+
+
+        arr1 = np.array(img1)
+        arr2 = np.array(img2)
+
+        if arr1.shape != arr2.shape:
+            print(f"KHÁC BIỆT: Kích thước ảnh khác nhau:")
+            print(f" - {os.path.basename(image1_path)}: {arr1.shape}")
+            print(f" - {os.path.basename(image2_path)}: {arr2.shape}")
+            print(f"--- So sánh thất bại (khác shape) ---")
+            return False
+
+        if np.array_equal(arr1, arr2):
+            print(f"GIỐNG HỆT NHAU: Ảnh gốc và ảnh giải mã khớp hoàn toàn.")
+            print(f"--- So sánh thành công ---")
+            return True
+        else:
+            diff = np.abs(arr1.astype(np.int64) - arr2.astype(np.int64)) 
+            
+            if diff.ndim == 3: # Ảnh màu
+                num_diff_pixels = np.count_nonzero(np.sum(diff, axis=2) > 0)
+            else: # Ảnh grayscale hoặc 1-bit
+                num_diff_pixels = np.count_nonzero(diff > 0)
+            
+            total_pixels = np.prod(arr1.shape[:2])
+            max_diff_val = np.max(diff)
+            avg_diff_val = np.mean(diff) if total_pixels > 0 else 0
+
+            print(f"KHÁC BIỆT: Ảnh gốc và ảnh giải mã CÓ sự khác biệt.")
+            print(f" - Số pixel khác nhau: {num_diff_pixels} / {total_pixels}")
+            print(f" - Mức khác biệt tối đa trên một kênh màu/giá trị: {max_diff_val}")
+            print(f" - Mức khác biệt trung bình (trên tất cả các giá trị): {avg_diff_val:.4f}")
+
+            print(f"--- So sánh hoàn tất (có khác biệt) ---")
+            return False
+
+    except FileNotFoundError as e:
+        print(f"Lỗi: Không tìm thấy file ảnh để so sánh: {e.filename}", file=sys.stderr)
+        print(f"--- So sánh thất bại ---")
+        return None 
+    except Exception as e:
+        print(f"Lỗi khi so sánh ảnh: {e}", file=sys.stderr)
+        print(f"--- So sánh thất bại ---")
+        return None
@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+import huffman_backend as hf
+
+STARTUP_BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_budget.json')
+
+# Mỗi kịch bản chạy trong một tiến trình Python mới (cold start), đo từ ngay trước câu lệnh import.
+STARTUP_SCENARIOS = {
+    'import': "import huffman_backend",
+    'decode_core': "import huffman_backend as hf; hf.decode_image_data",
+    'pipeline': "import huffman_pipeline",
+    'archive': "import huffman_archive",
+    'encode_file': "import huffman_backend as hf; hf.encode_image; hf.Image",
+}
+TRACKED_MODULES = ('numpy', 'PIL')
+
+
+def _mb_per_second(n_bytes, seconds):
+    return n_bytes / (1024 * 1024) / seconds if seconds > 0 else float('inf')
+
+
+def benchmark_coders(image_paths, coders=None, repeat=1, stream_counts=(1,)):
+    """So sánh tỉ lệ nén và tốc độ (MB/s trên dữ liệu pixel gốc) của các bộ mã hóa entropy.
+
+    stream_counts: các số luồng bit cần đo, chỉ áp dụng cho coder hỗ trợ chia luồng.
+    """
+    if coders is None:
+        coders = list(hf.ENTROPY_CODERS)
+
+    results = []
+    for image_path in image_paths:
+        try:
+            image = Image.open(image_path)
+            data, _ = hf.flatten_image_data(image)
+        except Exception as e:
+            print(f"Lỗi khi mở ảnh '{image_path}': {e}", file=sys.stderr)
+            continue
+
+        raw_bytes = data.nbytes
+        for coder_name, num_streams in [(c, n) for c in coders for n in stream_counts]:
+            entropy_coder = hf.get_entropy_coder(coder_name)
+            if entropy_coder is None or (num_streams > 1 and not entropy_coder.supports_streams):
+                continue
+
+            encode_time = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                encoded = entropy_coder.encode(data, num_streams=num_streams)
+                encode_time = min(encode_time, time.perf_counter() - start)
+            if encoded is None:
+                print(f"Lỗi: {coder_name} không mã hóa được '{image_path}'.", file=sys.stderr)
+                continue
+            model, payload, layout = encoded
+
+            decode_time = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                decoded = entropy_coder.decode(model, payload, len(data), layout)
+                decode_time = min(decode_time, time.perf_counter() - start)
+
+            encoded_bytes = len(payload) + len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+            results.append({
+                'image': image_path,
+                'coder': coder_name if num_streams == 1 else f"{coder_name}x{num_streams}",
+                'raw_bytes': raw_bytes,
+                'encoded_bytes': encoded_bytes,
+                'ratio': encoded_bytes / raw_bytes if raw_bytes else 0.0,
+                'encode_mb_s': _mb_per_second(raw_bytes, encode_time),
+                'decode_mb_s': _mb_per_second(raw_bytes, decode_time),
+                'lossless': decoded is not None and np.array_equal(np.asarray(decoded), data),
+            })
+    return results
+
+
+def measure_startup(code, repeat=5):
+    """Chạy code trong tiến trình mới repeat lần. Trả về (ms import tốt nhất, ms cả tiến trình tốt nhất, module nặng đã nạp)."""
+    script = (f"import sys, time; start = time.perf_counter(); {code}; "
+              f"print(time.perf_counter() - start); print(' '.join(m for m in {TRACKED_MODULES!r} if m in sys.modules))")
+    import_time = process_time = float('inf')
+    loaded = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+        elapsed = time.perf_counter() - start
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "lỗi không rõ")
+        lines = completed.stdout.splitlines()
+        import_time = min(import_time, float(lines[-2]))
+        process_time = min(process_time, elapsed)
+        loaded = lines[-1].split()
+    return import_time * 1000, process_time * 1000, loaded
+
+
+def benchmark_startup(scenarios=None, repeat=5):
+    """Đo thời gian import (cold start) của các kịch bản trong STARTUP_SCENARIOS."""
+    results = []
+    for name in scenarios or STARTUP_SCENARIOS:
+        try:
+            import_ms, process_ms, loaded = measure_startup(STARTUP_SCENARIOS[name], repeat)
+        except (KeyError, RuntimeError, OSError) as e:
+            print(f"Lỗi khi đo kịch bản khởi động '{name}': {e}", file=sys.stderr)
+            continue
+        results.append({'scenario': name, 'import_ms': import_ms, 'process_ms': process_ms, 'modules': loaded})
+    return results
+
+
+def load_startup_budget(path=STARTUP_BUDGET_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print(f"Lỗi: Không tìm thấy file ngân sách khởi động '{path}'", file=sys.stderr)
+    except (OSError, ValueError) as e:
+        print(f"Lỗi khi đọc file ngân sách khởi động: {e}", file=sys.stderr)
+    return None
+
+
+def check_startup_budget(results, budget):
+    """So kết quả với ngân sách (thời gian import tối đa, module không được nạp). Trả về danh sách vi phạm."""
+    violations = []
+    for row in results:
+        limits = budget.get('scenarios', {}).get(row['scenario'])
+        if limits is None:
+            continue
+        if 'max_import_ms' in limits and row['import_ms'] > limits['max_import_ms']:
+            violations.append(f"{row['scenario']}: import {row['import_ms']:.1f} ms > {limits['max_import_ms']} ms")
+        for module in limits.get('forbidden_modules', []):
+            if module in row['modules']:
+                violations.append(f"{row['scenario']}: đã nạp '{module}'")
+    return violations
+
+
+def print_startup_results(results, budget=None):
+    scenarios = budget.get('scenarios', {}) if budget else {}
+    print(f"{'Kịch bản':<14} {'Import (ms)':>12} {'Ngân sách':>10} {'Tiến trình (ms)':>16}  Module đã nạp")
+    for row in results:
+        limit = scenarios.get(row['scenario'], {}).get('max_import_ms')
+        print(f"{row['scenario']:<14} {row['import_ms']:>12.1f} {limit if limit is not None else '-':>10} "
+              f"{row['process_ms']:>16.1f}  {', '.join(row['modules']) or '-'}")
+
+
+def print_results(results):
+    print(f"{'Ảnh':<32} {'Coder':<11} {'Gốc (B)':>10} {'Nén (B)':>10} {'Tỉ suất':>8} {'Enc MB/s':>9} {'Dec MB/s':>9}  OK")
+    for row in results:
+        print(f"{row['image'][-32:]:<32} {row['coder']:<11} {row['raw_bytes']:>10} {row['encoded_bytes']:>10} "
+              f"{row['ratio']:>8.4f} {row['encode_mb_s']:>9.2f} {row['decode_mb_s']:>9.2f}  {'✓' if row['lossless'] else '✗'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark các bộ mã hóa entropy trên ảnh.")
+    parser.add_argument('images', nargs='*', help="Đường dẫn các ảnh cần đo")
+    parser.add_argument('--coder', action='append', dest='coders', help="Chỉ đo coder này (có thể lặp lại)")
+    parser.add_argument('--repeat', type=int, default=1, help="Số lần lặp, lấy thời gian tốt nhất")
+    parser.add_argument('--streams', type=int, nargs='+', default=[1], help="Số luồng bit cần đo (vd: 1 8 32)")
+    parser.add_argument('--startup', action='store_true', help="Đo thời gian khởi động (import) và so với ngân sách")
+    parser.add_argument('--startup-repeat', type=int, default=5, help="Số tiến trình mới cho mỗi kịch bản khởi động")
+    parser.add_argument('--budget', default=STARTUP_BUDGET_PATH, help="File JSON ngân sách khởi động")
+    args = parser.parse_args(argv)
+    if not args.images and not args.startup:
+        parser.error("cần ít nhất một ảnh hoặc --startup")
+
+    if args.startup:
+        budget = load_startup_budget(args.budget)
+        startup_results = benchmark_startup(repeat=args.startup_repeat)
+        print_startup_results(startup_results, budget)
+        violations = check_startup_budget(startup_results, budget) if budget is not None else []
+        for violation in violations:
+            print(f"Vượt ngân sách khởi động: {violation}", file=sys.stderr)
+        if budget is None or violations or len(startup_results) != len(STARTUP_SCENARIOS):
+            return 1
+        if not args.images:
+            return 0
+
+    results = benchmark_coders(args.images, args.coders, args.repeat, args.streams)
+    print_results(results)
+    return 0 if results and all(row['lossless'] for row in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
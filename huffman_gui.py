@@ -7,7 +7,7 @@ import io
 try:
     import huffman_backend as hf
 except ImportError:
-    messagebox.showerror("Lỗi", "Không tìm thấy file 'huffman_backend.py'. Hãy đảm bảo nó nằm cùng thư mục.")
+    messagebox.showerror("Lỗi", "Không tìm thấy package 'huffman_backend'. Hãy đảm bảo thư mục huffman_backend nằm cùng thư mục với file này.")
     sys.exit(1)
 
 class TextRedirector(io.StringIO):
@@ -0,0 +1,379 @@
+import os
+import pickle
+import queue
+import struct
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+import huffman_backend as hf
+
+# Giải mã theo dây chuyền: đọc khối -> giải mã -> ghi ảnh, mỗi bước một luồng,
+# nối với nhau bằng hàng đợi có giới hạn. Payload được đọc theo từng khối READ_BLOCK_BYTES;
+# file Huffman (một hay nhiều luồng bit) và dữ liệu thô (stored) được giải mã ngay khi mỗi
+# khối tới và trả về dần từng đoạn ảnh. Các file khác (tANS, planes, progressive) phải đọc
+# và giải mã xong toàn bộ rồi mới ghi.
+
+DEFAULT_PNG_COMPRESS_LEVEL = 6
+READ_BLOCK_BYTES = 1 << 16
+_DONE = object()
+_END_UNIT = object()
+
+
+class _PipelineStopped(Exception):
+    pass
+
+
+def _put(q, item, stop_event):
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+    raise _PipelineStopped()
+
+
+def _get(q, stop_event):
+    while not stop_event.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    raise _PipelineStopped()
+
+
+def plan_decode_units(metadata):
+    """Các khối giải mã của payload: list (số byte, số phần tử, layout của khối).
+
+    Trả về None nếu file không giải mã dần được (phải giải mã toàn bộ một lần).
+    Số byte None: đọc đến hết file.
+    """
+    expected_elements = int(np.prod(metadata['shape'])) if metadata['shape'] else 0
+    if expected_elements == 0:
+        return None
+    if metadata.get('method') == 'stored':
+        itemsize = np.dtype(metadata.get('dtype_str', np.dtype(np.uint8).str)).itemsize
+        return [(expected_elements * itemsize, expected_elements, None)]
+
+    layout = metadata.get('layout')
+    # File cũ (không có 'method'/'coder') là Huffman một luồng.
+    method = metadata.get('method', 'entropy')
+    entropy_coder = hf.ENTROPY_CODERS.get(metadata.get('coder', 'huffman'))
+    if method not in ('entropy', 'huffman') or not hasattr(entropy_coder, 'iter_decode_blocks'):
+        return None
+    if not layout:
+        return [(None, expected_elements, None)]
+    return [(sum((bits + 7) // 8 for bits in layout['bit_lengths']), expected_elements, layout)]
+
+
+class _ArraySink:
+    """Ghi thẳng vào memmap: .npy (kèm header numpy) hoặc .raw (byte thô)."""
+
+    def __init__(self, output_path, shape, dtype):
+        if output_path.lower().endswith('.npy'):
+            self.array = np.lib.format.open_memmap(output_path, mode='w+', dtype=dtype, shape=shape)
+        else:
+            self.array = np.memmap(output_path, mode='w+', dtype=dtype, shape=shape)
+        self.flat = self.array.reshape(-1)
+        self.position = 0
+
+    def write(self, chunk):
+        self.flat[self.position:self.position + len(chunk)] = chunk
+        self.position += len(chunk)
+
+    def close(self):
+        self.array.flush()
+        del self.flat
+        del self.array
+
+
+class _RowSink:
+    """Gom các phần tử liên tiếp thành hàng hoàn chỉnh rồi chuyển cho write_rows."""
+
+    def __init__(self, output_path, shape):
+        self.file = open(output_path, 'wb')
+        self.height, self.width = shape[0], shape[1]
+        self.row_elements = int(np.prod(shape[1:]))
+        self.pending = None
+
+    def write(self, chunk):
+        if self.pending is not None and len(self.pending):
+            chunk = np.concatenate((self.pending, chunk))
+        n_rows = len(chunk) // self.row_elements
+        if n_rows:
+            self.write_rows(chunk[:n_rows * self.row_elements].reshape(n_rows, self.row_elements))
+        self.pending = chunk[n_rows * self.row_elements:]
+
+    def write_rows(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        self.file.close()
+
+
+class _BmpSink(_RowSink):
+    """BMP không nén, ghi từ trên xuống (chiều cao âm) nên không cần đợi đủ ảnh."""
+    MODES = {'L': 8, 'P': 8, 'RGB': 24}
+
+    def __init__(self, output_path, shape, image_mode, palette):
+        super().__init__(output_path, shape)
+        self.image_mode = image_mode
+        bits_per_pixel = self.MODES[image_mode]
+        row_bytes = self.width * bits_per_pixel // 8
+        self.row_padding = (-row_bytes) % 4
+
+        if image_mode == 'RGB':
+            color_table = b""
+        else:
+            if image_mode == 'P' and palette:
+                rgb = np.zeros(768, dtype=np.uint8)
+                rgb[:min(len(palette), 768)] = palette[:768]
+                rgb = rgb.reshape(256, 3)
+            else:
+                rgb = np.repeat(np.arange(256, dtype=np.uint8)[:, None], 3, axis=1)
+            bgra = np.zeros((256, 4), dtype=np.uint8)
+            bgra[:, :3] = rgb[:, ::-1]
+            color_table = bgra.tobytes()
+
+        image_size = (row_bytes + self.row_padding) * self.height
+        pixel_offset = 14 + 40 + len(color_table)
+        self.file.write(struct.pack('<2sIHHI', b'BM', pixel_offset + image_size, 0, 0, pixel_offset))
+        self.file.write(struct.pack('<IiiHHIIiiII', 40, self.width, -self.height, 1, bits_per_pixel, 0,
+                                    image_size, 2835, 2835, 0 if image_mode == 'RGB' else 256, 0))
+        self.file.write(color_table)
+
+    def write_rows(self, rows):
+        if self.image_mode == 'RGB':
+            rows = rows.reshape(len(rows), self.width, 3)[:, :, ::-1].reshape(len(rows), -1)
+        if self.row_padding:
+            rows = np.concatenate((rows, np.zeros((len(rows), self.row_padding), dtype=np.uint8)), axis=1)
+        self.file.write(np.ascontiguousarray(rows, dtype=np.uint8).tobytes())
+
+
+class _PngSink(_RowSink):
+    """PNG 8-bit ghi dần: mỗi khối hàng được nén zlib ngay và ghi thành chunk IDAT."""
+    COLOR_TYPES = {'L': 0, 'RGB': 2, 'P': 3, 'LA': 4, 'RGBA': 6}
+
+    def __init__(self, output_path, shape, image_mode, palette, compress_level):
+        super().__init__(output_path, shape)
+        self.compressor = zlib.compressobj(compress_level)
+        self.file.write(b'\x89PNG\r\n\x1a\n')
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, 8, self.COLOR_TYPES[image_mode], 0, 0, 0))
+        if image_mode == 'P':
+            palette = list(palette)[:768] if palette else [v for v in range(256) for _ in range(3)]
+            self._chunk(b'PLTE', bytes(palette[:len(palette) - len(palette) % 3]))
+
+    def _chunk(self, chunk_type, data):
+        self.file.write(struct.pack('>I', len(data)))
+        self.file.write(chunk_type)
+        self.file.write(data)
+        self.file.write(struct.pack('>I', zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+    def write_rows(self, rows):
+        # Filter 0 (None) cho mọi hàng: nhanh nhất, phần nén để zlib lo.
+        filtered = np.zeros((len(rows), self.row_elements + 1), dtype=np.uint8)
+        filtered[:, 1:] = rows
+        compressed = self.compressor.compress(filtered.tobytes())
+        if compressed:
+            self._chunk(b'IDAT', compressed)
+
+    def close(self):
+        try:
+            self._chunk(b'IDAT', self.compressor.flush())
+            self._chunk(b'IEND', b'')
+        finally:
+            super().close()
+
+
+class _PilSink:
+    """Dự phòng cho mode/định dạng không ghi dần được: gom đủ mảng rồi lưu bằng PIL."""
+
+    def __init__(self, output_path, metadata, dtype, compress_level):
+        self.output_path = output_path
+        self.metadata = metadata
+        self.compress_level = compress_level
+        self.flat = np.empty(int(np.prod(metadata['shape'])), dtype=dtype)
+        self.position = 0
+
+    def write(self, chunk):
+        self.flat[self.position:self.position + len(chunk)] = chunk
+        self.position += len(chunk)
+
+    def close(self):
+        image_mode = self.metadata['mode']
+        decoded_image = hf.array_to_image(self.flat.reshape(self.metadata['shape']), image_mode, self.metadata.get('palette'))
+        self.output_path = hf.save_decoded_image(decoded_image, self.output_path, image_mode, self.compress_level)
+
+
+def open_output_sink(output_path, metadata, dtype, compress_level=DEFAULT_PNG_COMPRESS_LEVEL):
+    output_ext = os.path.splitext(output_path)[1].lower()
+    shape = metadata['shape']
+    image_mode = metadata['mode']
+    palette = metadata.get('palette')
+
+    if output_ext in ('.npy', '.raw'):
+        return _ArraySink(output_path, shape, dtype)
+    if dtype == np.uint8 and len(shape) >= 2 and shape[0] > 0 and shape[1] > 0:
+        if output_ext == '.bmp' and image_mode in _BmpSink.MODES:
+            return _BmpSink(output_path, shape, image_mode, palette)
+        if output_ext == '.png' and image_mode in _PngSink.COLOR_TYPES:
+            return _PngSink(output_path, shape, image_mode, palette, compress_level)
+    return _PilSink(output_path, metadata, dtype, compress_level)
+
+
+def _read_stage(f_in, units, out_q, stop_event, errors):
+    """Mỗi khối giải mã gửi đi: (số phần tử, layout), các đoạn tối đa READ_BLOCK_BYTES byte, rồi _END_UNIT."""
+    try:
+        for byte_length, count, layout in units:
+            _put(out_q, (count, layout), stop_event)
+            remaining = byte_length
+            while remaining is None or remaining > 0:
+                block = f_in.read(READ_BLOCK_BYTES if remaining is None else min(READ_BLOCK_BYTES, remaining))
+                if not block:
+                    if remaining:
+                        raise ValueError("File mã hóa bị cắt cụt (thiếu dữ liệu khối).")
+                    break
+                if remaining is not None:
+                    remaining -= len(block)
+                _put(out_q, block, stop_event)
+            _put(out_q, _END_UNIT, stop_event)
+        _put(out_q, _DONE, stop_event)
+    except _PipelineStopped:
+        pass
+    except Exception as e:
+        errors.append(f"Lỗi khi đọc khối dữ liệu: {e}")
+        stop_event.set()
+
+
+def _iter_unit_blocks(in_q, stop_event):
+    while True:
+        block = _get(in_q, stop_event)
+        if block is _END_UNIT:
+            return
+        yield block
+
+
+def _decode_stage(in_q, out_q, metadata, target_dtype, streaming, stop_event, errors):
+    try:
+        entropy_coder = hf.ENTROPY_CODERS.get(metadata.get('coder', 'huffman'))
+        model = metadata['model'] if 'model' in metadata else metadata.get('tree')
+        while True:
+            item = _get(in_q, stop_event)
+            if item is _DONE:
+                break
+            count, layout = item
+            blocks = _iter_unit_blocks(in_q, stop_event)
+            if not streaming:
+                decoded = hf.decode_image_data(metadata, b"".join(blocks))
+                if decoded is None:
+                    raise ValueError("Không giải mã được khối dữ liệu.")
+                _put(out_q, decoded.reshape(-1), stop_event)
+                continue
+            if metadata.get('method') == 'stored':
+                for block in blocks:
+                    _put(out_q, np.frombuffer(block, dtype=target_dtype), stop_event)
+                continue
+
+            produced = 0
+            for chunk in entropy_coder.iter_decode_blocks(model, blocks, count, layout):
+                produced += len(chunk)
+                _put(out_q, np.asarray(chunk, dtype=target_dtype), stop_event)
+            if produced != count:
+                raise ValueError("Số phần tử giải mã không khớp kích thước khối.")
+        _put(out_q, _DONE, stop_event)
+    except _PipelineStopped:
+        pass
+    except Exception as e:
+        errors.append(f"Lỗi khi giải mã khối dữ liệu: {e}")
+        stop_event.set()
+
+
+def decode_image_pipelined(encoded_path, output_path, compress_level=DEFAULT_PNG_COMPRESS_LEVEL,
+                           queue_size=4):
+    """Giải mã với các bước đọc / giải mã / ghi chạy song song.
+
+    output_path: .npy hoặc .raw (memmap), .bmp (không nén), .png (zlib với compress_level),
+    các định dạng khác được lưu bằng PIL sau khi giải mã xong.
+    """
+    print(f"--- Bắt đầu giải mã (pipeline) ---")
+    try:
+        f_in = open(encoded_path, 'rb')
+    except FileNotFoundError:
+        print(f"Lỗi: Không tìm thấy file mã hóa '{encoded_path}'", file=sys.stderr)
+        return False
+    except OSError as e:
+        print(f"Lỗi khi đọc file mã hóa: {e}", file=sys.stderr)
+        return False
+
+    with f_in:
+        try:
+            metadata = pickle.load(f_in)
+            shape = metadata['shape']
+            target_dtype = np.dtype(metadata.get('dtype_str', np.dtype(np.uint8).str))
+        except (pickle.UnpicklingError, EOFError, ImportError, IndexError, KeyError, TypeError) as e:
+            print(f"Lỗi: File mã hóa '{encoded_path}' bị hỏng hoặc không đúng định dạng. ({e})", file=sys.stderr)
+            return False
+
+        units = plan_decode_units(metadata)
+        streaming = units is not None
+        if not streaming:
+            if shape and int(np.prod(shape)) > 0:
+                kind = metadata.get('method') if not metadata.get('coder') else f"{metadata.get('method')}/{metadata['coder']}"
+                print(f"Cảnh báo: File mã hóa kiểu '{kind}' không giải mã dần được, phải giải mã toàn bộ trước khi ghi. "
+                      f"Mã hóa bằng coder='huffman', không dùng progressive/mặt phẳng byte "
+                      f"để các bước chạy chồng nhau.", file=sys.stderr)
+            units = [(None, int(np.prod(shape)) if shape else 0, None)]
+
+        try:
+            sink = open_output_sink(output_path, metadata, target_dtype, compress_level)
+        except (OSError, ValueError) as e:
+            print(f"Lỗi khi mở file đầu ra '{output_path}': {e}", file=sys.stderr)
+            return False
+
+        stop_event = threading.Event()
+        errors = []
+        read_q = queue.Queue(maxsize=queue_size)
+        decode_q = queue.Queue(maxsize=queue_size)
+        workers = [
+            threading.Thread(target=_read_stage, args=(f_in, units, read_q, stop_event, errors), daemon=True),
+            threading.Thread(target=_decode_stage, args=(read_q, decode_q, metadata, target_dtype, streaming, stop_event, errors), daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+
+        # Bước ghi chạy ở luồng chính.
+        try:
+            while True:
+                chunk = _get(decode_q, stop_event)
+                if chunk is _DONE:
+                    break
+                sink.write(chunk)
+            sink.close()
+        except _PipelineStopped:
+            pass
+        except Exception as e:
+            errors.append(f"Lỗi khi ghi ảnh giải mã: {e}")
+            stop_event.set()
+        finally:
+            for worker in workers:
+                worker.join()
+
+    if errors:
+        for message in errors:
+            print(message, file=sys.stderr)
+        try:
+            if hasattr(sink, 'file'):
+                sink.file.close()
+            if os.path.exists(output_path):
+                os.remove(output_path)
+        except OSError:
+            pass
+        return False
+
+    output_path = getattr(sink, 'output_path', output_path)
+    print(f"Đã lưu ảnh giải mã: {output_path}")
+    print(f"--- Giải mã hoàn tất ---")
+    return output_path